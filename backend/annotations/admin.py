@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Annotation, AnnotationTask, ConsensusResult
+from .models import Annotation, AnnotationTask, ConsensusResult, SimilarityCache, ConsensusEvent
 
 
 @admin.register(Annotation)
@@ -12,10 +12,10 @@ class AnnotationAdmin(admin.ModelAdmin):
 
 @admin.register(AnnotationTask)
 class AnnotationTaskAdmin(admin.ModelAdmin):
-    list_display = ['id', 'clip', 'assigned_to', 'status', 'priority', 'created_at']
-    list_filter = ['status', 'priority', 'created_at']
+    list_display = ['id', 'clip', 'assigned_to', 'status', 'dialect', 'priority', 'created_at']
+    list_filter = ['status', 'dialect', 'priority', 'created_at']
     search_fields = ['clip__id', 'assigned_to__username']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'dialect', 'created_at', 'updated_at']
 
 
 @admin.register(ConsensusResult)
@@ -24,3 +24,18 @@ class ConsensusResultAdmin(admin.ModelAdmin):
     list_filter = ['computed_at']
     search_fields = ['clip__id', 'final_transcription']
     readonly_fields = ['computed_at']
+
+
+@admin.register(SimilarityCache)
+class SimilarityCacheAdmin(admin.ModelAdmin):
+    list_display = ['clip', 'updated_at']
+    search_fields = ['clip__id']
+    readonly_fields = ['annotation_ids', 'pair_similarities', 'similarity_sums', 'updated_at']
+
+
+@admin.register(ConsensusEvent)
+class ConsensusEventAdmin(admin.ModelAdmin):
+    list_display = ['clip', 'event_type', 'publish_attempts', 'published_at', 'processed_at', 'created_at']
+    list_filter = ['event_type', 'created_at']
+    search_fields = ['clip__id']
+    readonly_fields = ['id', 'created_at']
@@ -0,0 +1,178 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+from rapidfuzz.process import cdist
+from django.conf import settings
+from django.db import connections, transaction
+from audio.models import AudioClip
+from .models import Annotation, ConsensusResult, SimilarityCache
+
+
+def similarity_matrix(transcriptions):
+    """All pairwise normalized Levenshtein similarities (0-100) in one C call, matching calculate_normalized_levenshtein_similarity"""
+    lowered = [transcription.lower() for transcription in transcriptions]
+    matrix = cdist(lowered, lowered, scorer=Levenshtein.normalized_similarity, dtype=np.float64, workers=1) * 100
+    
+    empty = np.array([not transcription for transcription in transcriptions])
+    matrix[empty, :] = 0.0
+    matrix[:, empty] = 0.0
+    return matrix
+
+
+def score_clips(batch):
+    """Score (clip_id, annotation_ids, transcriptions) tuples into SimilarityCache-shaped rows; runs in pool workers"""
+    results = []
+    
+    for clip_id, annotation_ids, transcriptions in batch:
+        matrix = similarity_matrix(transcriptions)
+        n = len(transcriptions)
+        
+        # Condensed order matches SimilarityCache: pair (i, j), i < j, at j * (j - 1) // 2 + i
+        pairs = [round(float(matrix[i, j]), 2) for j in range(n) for i in range(j)]
+        sums = [0.0] * n
+        for j in range(n):
+            for i in range(j):
+                similarity = pairs[j * (j - 1) // 2 + i]
+                sums[i] += similarity
+                sums[j] += similarity
+        
+        best_idx = max(range(n), key=lambda i: (sums[i], i))
+        results.append({
+            'clip_id': clip_id,
+            'annotation_ids': annotation_ids,
+            'pair_similarities': pairs,
+            'similarity_sums': sums,
+            'final_transcription': transcriptions[best_idx],
+            'consensus_score': sum(pairs) / len(pairs),
+        })
+    
+    return results
+
+
+def iter_clip_batches(clips, chunk_size):
+    """Stream clips in id order with their annotations, one annotation query per chunk of clips"""
+    clip_ids = clips.order_by('id').values_list('id', flat=True)
+    
+    chunk = []
+    for clip_id in clip_ids.iterator(chunk_size=chunk_size):
+        chunk.append(clip_id)
+        if len(chunk) == chunk_size:
+            yield clip_batch(chunk)
+            chunk = []
+    
+    if chunk:
+        yield clip_batch(chunk)
+
+
+def clip_batch(clip_ids):
+    grouped = {}
+    rows = Annotation.objects.filter(clip_id__in=clip_ids).order_by('clip_id', 'created_at').values_list(
+        'clip_id', 'id', 'transcription'
+    )
+    for clip_id, annotation_id, transcription in rows:
+        annotation_ids, transcriptions = grouped.setdefault(str(clip_id), ([], []))
+        annotation_ids.append(str(annotation_id))
+        transcriptions.append(transcription)
+    
+    return [
+        (clip_id, annotation_ids, transcriptions)
+        for clip_id, (annotation_ids, transcriptions) in grouped.items()
+        if len(transcriptions) >= settings.REQUIRED_ANNOTATIONS
+    ]
+
+
+def write_results(results):
+    """Persist one scored chunk with bulk writes; returns (clips to promote, validated clips now below threshold)"""
+    by_clip = {result['clip_id']: result for result in results}
+    clips = AudioClip.objects.in_bulk(list(by_clip))
+    
+    promote = []
+    below_threshold = []
+    
+    with transaction.atomic():
+        SimilarityCache.objects.bulk_create(
+            [
+                SimilarityCache(
+                    clip_id=clip_id,
+                    annotation_ids=result['annotation_ids'],
+                    pair_similarities=result['pair_similarities'],
+                    similarity_sums=result['similarity_sums'],
+                )
+                for clip_id, result in by_clip.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['clip'],
+            update_fields=['annotation_ids', 'pair_similarities', 'similarity_sums', 'updated_at']
+        )
+        
+        existing = {
+            str(consensus.clip_id): consensus
+            for consensus in ConsensusResult.objects.filter(clip_id__in=list(by_clip))
+        }
+        created = []
+        for clip_id, result in by_clip.items():
+            n = len(result['annotation_ids'])
+            matrix = {
+                f"{i}-{j}": result['pair_similarities'][j * (j - 1) // 2 + i]
+                for j in range(n) for i in range(j)
+            }
+            consensus = existing.get(clip_id) or ConsensusResult(clip_id=clip_id)
+            consensus.final_transcription = result['final_transcription']
+            consensus.consensus_score = result['consensus_score']
+            consensus.annotation_count = n
+            consensus.similarity_matrix = matrix
+            if consensus.pk is None:
+                created.append(consensus)
+        
+        ConsensusResult.objects.bulk_update(
+            list(existing.values()),
+            ['final_transcription', 'consensus_score', 'annotation_count', 'similarity_matrix']
+        )
+        ConsensusResult.objects.bulk_create(created)
+        
+        Contribution = ConsensusResult.contributing_annotations.through
+        Contribution.objects.bulk_create([
+            Contribution(consensusresult_id=consensus.pk, annotation_id=annotation_id)
+            for consensus in created
+            for annotation_id in by_clip[str(consensus.clip_id)]['annotation_ids']
+        ])
+        
+        for clip_id, clip in clips.items():
+            result = by_clip[str(clip_id)]
+            clip.final_transcription = result['final_transcription']
+            clip.consensus_similarity = result['consensus_score']
+            
+            passes = result['consensus_score'] >= settings.CONSENSUS_THRESHOLD
+            if passes and clip.status == 'in_annotation':
+                promote.append(str(clip_id))
+            elif not passes and clip.status == 'validated':
+                below_threshold.append(str(clip_id))
+        
+        AudioClip.objects.bulk_update(list(clips.values()), ['final_transcription', 'consensus_similarity'])
+    
+    return promote, below_threshold
+
+
+def recompute_consensus(clips, chunk_size, workers):
+    """Recompute consensus for many clips across a process pool, yielding per-chunk write results"""
+    # Forked workers must not share the parent's database sockets
+    connections.close_all()
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        
+        for batch in iter_clip_batches(clips, chunk_size):
+            if not batch:
+                continue
+            pending.add(pool.submit(score_clips, batch))
+            
+            # Bound the work in flight so memory stays flat however many clips there are
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results = future.result()
+                    yield len(results), write_results(results)
+        
+        for future in pending:
+            results = future.result()
+            yield len(results), write_results(results)
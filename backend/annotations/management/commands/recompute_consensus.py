@@ -0,0 +1,52 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from audio.models import AudioClip
+from annotations.consensus import recompute_consensus
+from annotations.queue import schedule_consensus_check
+
+
+class Command(BaseCommand):
+    help = 'Recompute consensus for every annotated clip, e.g. after changing CONSENSUS_THRESHOLD'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dialect', choices=[choice[0] for choice in AudioClip.DIALECT_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=settings.CONSENSUS_BULK_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    
+    def handle(self, *args, **options):
+        clips = AudioClip.objects.filter(
+            status__in=['in_annotation', 'validated'],
+            annotation_count__gte=settings.REQUIRED_ANNOTATIONS
+        )
+        if options['dialect']:
+            clips = clips.filter(dialect=options['dialect'])
+        
+        started = time.monotonic()
+        scored = 0
+        promoted = 0
+        below_threshold = 0
+        
+        for count, (promote, below) in recompute_consensus(clips, options['chunk_size'], options['workers']):
+            scored += count
+            promoted += len(promote)
+            below_threshold += len(below)
+            
+            # Newly passing clips go through the regular check, which finds their similarities cached
+            for clip_id in promote:
+                schedule_consensus_check(clip_id)
+            
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{scored} clips scored ({scored / elapsed:.1f} clips/sec)')
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed consensus for {scored} clips in {elapsed:.1f}s '
+            f'({scored / elapsed if elapsed else 0:.1f} clips/sec)'
+        ))
+        self.stdout.write(f'{promoted} clips now reach consensus and were queued for validation')
+        if below_threshold:
+            self.stdout.write(self.style.WARNING(
+                f'{below_threshold} validated clips fall below CONSENSUS_THRESHOLD and were left validated'
+            ))
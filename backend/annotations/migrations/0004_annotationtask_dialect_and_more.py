@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_clip_dialect(apps, schema_editor):
+    AnnotationTask = apps.get_model('annotations', 'AnnotationTask')
+    AudioClip = apps.get_model('audio', 'AudioClip')
+    AnnotationTask.objects.update(
+        dialect=Subquery(AudioClip.objects.filter(id=OuterRef('clip_id')).values('dialect')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0001_initial'),
+        ('annotations', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='annotationtask',
+            name='dialect',
+            field=models.CharField(choices=[('sheng', 'Sheng'), ('kiamu', 'Kiamu'), ('kibajuni', 'Kibajuni')], default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_clip_dialect, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='annotationtask',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-priority', 'created_at'], name='annotation_tasks_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='annotationtask',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['dialect', '-priority', 'created_at'], name='annotation_tasks_dialect_idx'),
+        ),
+    ]
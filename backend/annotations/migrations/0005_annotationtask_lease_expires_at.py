@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('annotations', '0004_annotationtask_dialect_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='annotationtask',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
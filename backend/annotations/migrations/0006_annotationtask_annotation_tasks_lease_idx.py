@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('annotations', '0005_annotationtask_lease_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='annotationtask',
+            index=models.Index(condition=models.Q(('status', 'assigned')), fields=['lease_expires_at'], name='annotation_tasks_lease_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0001_initial'),
+        ('annotations', '0006_annotationtask_annotation_tasks_lease_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annotation_ids', models.JSONField(default=list)),
+                ('pair_similarities', models.JSONField(default=list)),
+                ('similarity_sums', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('clip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_cache', to='audio.audioclip')),
+            ],
+            options={
+                'db_table': 'similarity_caches',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('annotations', '0007_similaritycache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='annotationtask',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('assigned', 'Assigned'), ('completed', 'Completed'), ('skipped', 'Skipped'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+    ]
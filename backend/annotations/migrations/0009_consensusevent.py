@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio', '0001_initial'),
+        ('annotations', '0008_alter_annotationtask_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsensusEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('event_type', models.CharField(choices=[('consensus_reached', 'Consensus Reached')], default='consensus_reached', max_length=30)),
+                ('publish_attempts', models.IntegerField(default=0)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('clip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consensus_events', to='audio.audioclip')),
+            ],
+            options={
+                'db_table': 'consensus_events',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['created_at'], name='consensus_events_open_idx')],
+            },
+        ),
+    ]
@@ -46,6 +46,7 @@ class AnnotationTask(models.Model):
         ('assigned', 'Assigned'),
         ('completed', 'Completed'),
         ('skipped', 'Skipped'),
+        ('cancelled', 'Cancelled'),
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -58,8 +59,11 @@ class AnnotationTask(models.Model):
         null=True
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Copied from the clip so claiming never joins audio_clips
+    dialect = models.CharField(max_length=20, choices=AudioClip.DIALECT_CHOICES)
     priority = models.IntegerField(default=0)
     assigned_at = models.DateTimeField(blank=True, null=True)
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
     completed_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -70,10 +74,30 @@ class AnnotationTask(models.Model):
         indexes = [
             models.Index(fields=['status', 'priority']),
             models.Index(fields=['assigned_to', 'status']),
+            models.Index(
+                fields=['-priority', 'created_at'],
+                name='annotation_tasks_pending_idx',
+                condition=models.Q(status='pending')
+            ),
+            models.Index(
+                fields=['dialect', '-priority', 'created_at'],
+                name='annotation_tasks_dialect_idx',
+                condition=models.Q(status='pending')
+            ),
+            models.Index(
+                fields=['lease_expires_at'],
+                name='annotation_tasks_lease_idx',
+                condition=models.Q(status='assigned')
+            ),
         ]
     
     def __str__(self):
         return f"Task for clip {self.clip.id} - {self.status}"
+    
+    def save(self, *args, **kwargs):
+        if not self.dialect:
+            self.dialect = self.clip.dialect
+        super().save(*args, **kwargs)
 
 
 class ConsensusResult(models.Model):
@@ -90,3 +114,50 @@ class ConsensusResult(models.Model):
     
     def __str__(self):
         return f"Consensus for clip {self.clip.id} - Score: {self.consensus_score}"
+
+
+class SimilarityCache(models.Model):
+    """Pairwise transcription similarities for a clip, grown one annotation at a time"""
+    
+    clip = models.OneToOneField(AudioClip, on_delete=models.CASCADE, related_name='similarity_cache')
+    annotation_ids = models.JSONField(default=list)
+    # Condensed upper triangle: pair (i, j), i < j, lives at j * (j - 1) // 2 + i
+    pair_similarities = models.JSONField(default=list)
+    similarity_sums = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'similarity_caches'
+    
+    def __str__(self):
+        return f"Similarities for clip {self.clip_id} ({len(self.annotation_ids)} annotations)"
+
+
+class ConsensusEvent(models.Model):
+    """Outbox row written with a clip's validation and relayed to the broker after commit"""
+    
+    EVENT_TYPES = [
+        ('consensus_reached', 'Consensus Reached'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    clip = models.ForeignKey(AudioClip, on_delete=models.CASCADE, related_name='consensus_events')
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPES, default='consensus_reached')
+    publish_attempts = models.IntegerField(default=0)
+    published_at = models.DateTimeField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'consensus_events'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                name='consensus_events_open_idx',
+                condition=models.Q(processed_at__isnull=True)
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} for clip {self.clip_id}"
@@ -0,0 +1,401 @@
+import logging
+from datetime import timedelta
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from audio.models import AudioClip
+from .models import Annotation, AnnotationTask
+
+logger = logging.getLogger(__name__)
+
+# The hash tag keeps every queue key in one Redis Cluster slot, so scripts and RENAME may span them
+QUEUE_PREFIX = '{annotation-queue}'
+BUILT_KEY = f'{QUEUE_PREFIX}:built'
+REBUILD_LOCK_KEY = f'{QUEUE_PREFIX}:rebuild-lock'
+# Priority dominates; creation time (seconds since epoch, < 1e10) breaks ties
+PRIORITY_WEIGHT = 10 ** 10
+# Tasks saved this long before a rebuild started may still have been uncommitted when it read the table
+REBUILD_CATCH_UP = timedelta(minutes=1)
+
+# Pops up to ARGV[2] best-ranked tasks on distinct clips the user has not seen, marking each clip seen, atomically.
+# KEYS: source queue, seen set, combined queue, then one queue per dialect named in ARGV[3..]
+CLAIM_SCRIPT = """
+local dialect_keys = {}
+for i = 3, #ARGV do
+    dialect_keys[ARGV[i]] = KEYS[i + 1]
+end
+
+local claimed = {}
+local members = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+for _, member in ipairs(members) do
+    local task_id, clip_id, dialect = string.match(member, '^([^:]+):([^:]+):([^:]+)$')
+    if redis.call('SISMEMBER', KEYS[2], clip_id) == 0 then
+        redis.call('ZREM', KEYS[3], member)
+        if dialect_keys[dialect] then
+            redis.call('ZREM', dialect_keys[dialect], member)
+        end
+        redis.call('SADD', KEYS[2], clip_id)
+        table.insert(claimed, member)
+        if #claimed >= tonumber(ARGV[2]) then
+            break
+        end
+    end
+end
+return claimed
+"""
+
+
+class QueueUnavailable(Exception):
+    pass
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.ANNOTATION_QUEUE_REDIS_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+            decode_responses=True
+        )
+    return _client
+
+
+def queue_key(dialect=None):
+    return f"{QUEUE_PREFIX}:{dialect or 'all'}"
+
+
+def seen_key(user_id):
+    return f"{QUEUE_PREFIX}:seen:{user_id}"
+
+
+def task_member(task_id, clip_id, dialect):
+    return f"{task_id}:{clip_id}:{dialect}"
+
+
+def task_score(priority, created_at):
+    return -priority * PRIORITY_WEIGHT + created_at.timestamp()
+
+
+def claimable_tasks(user, dialect=None):
+    """Pending tasks the user may take: not their own clip, not already annotated or held by them"""
+    # Anti-joins probe (clip, annotator) per candidate, so cost does not grow with the user's history
+    queryset = AnnotationTask.objects.filter(status='pending').exclude(
+        Exists(Annotation.objects.filter(clip_id=OuterRef('clip_id'), annotator=user))
+    ).exclude(
+        Exists(AudioClip.objects.filter(id=OuterRef('clip_id'), uploader=user))
+    ).exclude(
+        Exists(AnnotationTask.objects.filter(clip_id=OuterRef('clip_id'), assigned_to=user, status='assigned'))
+    )
+    
+    if dialect:
+        queryset = queryset.filter(dialect=dialect)
+    
+    return queryset
+
+
+def lease_fields(user):
+    now = timezone.now()
+    return {
+        'assigned_to': user,
+        'status': 'assigned',
+        'assigned_at': now,
+        'lease_expires_at': now + timedelta(seconds=settings.ANNOTATION_LEASE_SECONDS),
+        'updated_at': now,
+    }
+
+
+def expired_leases(now):
+    """Assigned tasks whose lease has lapsed, including claims made before leases were recorded"""
+    stale_before = now - timedelta(seconds=settings.ANNOTATION_LEASE_SECONDS)
+    return AnnotationTask.objects.filter(status='assigned').filter(
+        Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True, assigned_at__lt=stale_before)
+    )
+
+
+def enqueue_tasks(tasks):
+    """Make pending tasks claimable; ZADD is idempotent, so re-enqueueing is harmless"""
+    if not settings.ANNOTATION_QUEUE_ENABLED:
+        return
+    
+    pipe = get_client().pipeline(transaction=False)
+    for task in tasks:
+        member = task_member(task.id, task.clip_id, task.dialect)
+        score = task_score(task.priority, task.created_at)
+        pipe.zadd(queue_key(), {member: score})
+        pipe.zadd(queue_key(task.dialect), {member: score})
+    pipe.execute()
+
+
+def dequeue_tasks(tasks):
+    """Drop tasks leased outside the claim script so later scans do not hand them out again"""
+    if not settings.ANNOTATION_QUEUE_ENABLED:
+        return
+    
+    pipe = get_client().pipeline(transaction=False)
+    for task in tasks:
+        member = task_member(task.id, task.clip_id, task.dialect)
+        pipe.zrem(queue_key(), member)
+        pipe.zrem(queue_key(task.dialect), member)
+    pipe.execute()
+
+
+def mark_seen(user_id, clip_id):
+    """Exclude a clip for a user whose seen set is already warm; a cold set is loaded from the database"""
+    if not settings.ANNOTATION_QUEUE_ENABLED:
+        return
+    
+    client = get_client()
+    key = seen_key(user_id)
+    if client.exists(key):
+        client.sadd(key, str(clip_id))
+
+
+def warm_seen_set(client, user):
+    key = seen_key(user.id)
+    
+    if not client.exists(key):
+        clip_ids = set(Annotation.objects.filter(annotator=user).values_list('clip_id', flat=True))
+        clip_ids.update(AudioClip.objects.filter(uploader=user).values_list('id', flat=True))
+        clip_ids.update(
+            AnnotationTask.objects.filter(assigned_to=user, status='assigned').values_list('clip_id', flat=True)
+        )
+        # The empty member keeps the set in existence for users with no history
+        client.sadd(key, '', *[str(clip_id) for clip_id in clip_ids])
+    
+    client.expire(key, settings.ANNOTATION_SEEN_TTL_SECONDS)
+    return key
+
+
+def schedule_rebuild(client):
+    from .tasks import rebuild_annotation_queue
+    
+    if client.set(REBUILD_LOCK_KEY, 1, nx=True, ex=300):
+        rebuild_annotation_queue.delay()
+
+
+def leased_tasks(user, task_ids, lease):
+    return list(AnnotationTask.objects.filter(
+        id__in=task_ids, assigned_to=user, status='assigned', assigned_at=lease['assigned_at']
+    ).select_related('clip').order_by('-priority', 'created_at'))
+
+
+def claim_from_queue(user, dialect=None, count=1):
+    client = get_client()
+    
+    if not client.exists(BUILT_KEY):
+        schedule_rebuild(client)
+        raise QueueUnavailable('Annotation queue has not been built')
+    
+    key = warm_seen_set(client, user)
+    claim = client.register_script(CLAIM_SCRIPT)
+    dialects = [code for code, _ in AudioClip.DIALECT_CHOICES]
+    tasks = []
+    
+    while len(tasks) < count:
+        members = claim(
+            keys=[queue_key(dialect), key, queue_key()] + [queue_key(code) for code in dialects],
+            args=[settings.ANNOTATION_QUEUE_SCAN_DEPTH, count - len(tasks)] + dialects
+        )
+        if not members:
+            break
+        
+        task_ids = [member.split(':')[0] for member in members]
+        lease = lease_fields(user)
+        claimable_tasks(user).filter(id__in=task_ids).update(**lease)
+        leased = leased_tasks(user, task_ids, lease)
+        tasks.extend(leased)
+        
+        # The database moved on without the queue (or the clip is the user's own); put back anything still open
+        if len(leased) < len(task_ids):
+            reopened = list(AnnotationTask.objects.filter(id__in=task_ids, status='pending'))
+            # Tasks another annotator leased first were never shown to this user, so their clips stay claimable;
+            # clips the database refused for this user stay seen, or the next scan would pop them again
+            kept = {str(task.id) for task in leased} | {str(task.id) for task in reopened}
+            lost_clip_ids = [member.split(':')[1] for member in members if member.split(':')[0] not in kept]
+            if lost_clip_ids:
+                client.srem(key, *lost_clip_ids)
+            enqueue_tasks(reopened)
+    
+    # The script only scans the head of the queue; clips the user has seen can fill it while work remains below
+    if len(tasks) < count and client.zcard(queue_key(dialect)) > settings.ANNOTATION_QUEUE_SCAN_DEPTH:
+        tasks.extend(claim_from_database(user, dialect, count - len(tasks)))
+    
+    return tasks
+
+
+def claim_from_database(user, dialect=None, count=1):
+    queryset = claimable_tasks(user, dialect).order_by('-priority', 'created_at')
+    
+    # Rows another annotator is claiming are skipped rather than waited on
+    with transaction.atomic():
+        candidates = queryset.select_for_update(skip_locked=True)[:count * settings.REQUIRED_ANNOTATIONS]
+        
+        task_ids = {}
+        for task_id, clip_id in candidates.values_list('id', 'clip_id'):
+            task_ids.setdefault(clip_id, task_id)
+            if len(task_ids) == count:
+                break
+        
+        lease = lease_fields(user)
+        AnnotationTask.objects.filter(id__in=task_ids.values()).update(**lease)
+    
+    tasks = leased_tasks(user, task_ids.values(), lease)
+    
+    try:
+        dequeue_tasks(tasks)
+    except redis.RedisError as exc:
+        logger.warning(f"Could not remove database-claimed tasks from the queue: {str(exc)}")
+    
+    return tasks
+
+
+def claim_tasks(user, dialect=None, count=1):
+    """Lease up to count tasks on distinct clips from Redis, falling back to the database when the queue is down"""
+    if settings.ANNOTATION_QUEUE_ENABLED:
+        try:
+            return claim_from_queue(user, dialect, count)
+        except (QueueUnavailable, redis.RedisError) as exc:
+            logger.warning(f"Claiming annotation tasks from the database: {str(exc)}")
+    
+    return claim_from_database(user, dialect, count)
+
+
+def claim_next_task(user, dialect=None):
+    tasks = claim_tasks(user, dialect)
+    return tasks[0] if tasks else None
+
+
+def release_tasks(tasks):
+    """Return assigned tasks to the pending pool in one update and make them claimable again"""
+    held = list(tasks.filter(status='assigned').values_list('id', 'assigned_to_id', 'clip_id'))
+    if not held:
+        return 0
+    
+    task_ids = [task_id for task_id, _, _ in held]
+    now = timezone.now()
+    # Re-filtering the caller's queryset keeps its predicates (such as an expired lease) in force at write time
+    holding = tasks.filter(id__in=task_ids, status='assigned')
+    open_clips = Q(clip__status__in=['pending', 'in_annotation'])
+    
+    # Clips that were validated or rejected while held need no more annotations
+    cancelled = holding.exclude(open_clips).update(status='cancelled', updated_at=now)
+    if cancelled:
+        logger.info(f"Cancelled {cancelled} held annotation tasks for closed clips")
+    
+    released = holding.filter(open_clips).update(
+        status='pending',
+        assigned_to=None,
+        assigned_at=None,
+        lease_expires_at=None,
+        updated_at=now
+    )
+    
+    if settings.ANNOTATION_QUEUE_ENABLED:
+        try:
+            # Released clips become claimable again for their previous holder too
+            pipe = get_client().pipeline(transaction=False)
+            for _, user_id, clip_id in held:
+                pipe.srem(seen_key(user_id), str(clip_id))
+            pipe.execute()
+            enqueue_tasks(AnnotationTask.objects.filter(id__in=task_ids, status='pending'))
+        except redis.RedisError as exc:
+            logger.warning(f"Could not re-enqueue released annotation tasks: {str(exc)}")
+    
+    return released
+
+
+def consensus_pending_key(clip_id):
+    return f"consensus-check:pending:{clip_id}"
+
+
+def consensus_inflight_key(clip_id):
+    return f"consensus-check:inflight:{clip_id}"
+
+
+def schedule_consensus_check(clip_id):
+    """Queue a consensus check after the debounce window unless one is already pending for the clip"""
+    from .tasks import check_consensus_and_reward
+    
+    countdown = settings.CONSENSUS_CHECK_DEBOUNCE_SECONDS
+    try:
+        ttl = countdown + settings.CONSENSUS_CHECK_INFLIGHT_SECONDS
+        if not get_client().set(consensus_pending_key(clip_id), 1, nx=True, ex=ttl):
+            return False
+    except redis.RedisError as exc:
+        logger.warning(f"Scheduling consensus check for clip {clip_id} without coalescing: {str(exc)}")
+    
+    check_consensus_and_reward.apply_async(args=[str(clip_id)], countdown=countdown)
+    return True
+
+
+def begin_consensus_check(clip_id):
+    """Claim the clip's in-flight flag; a check that loses the race hands off to one scheduled after it"""
+    try:
+        client = get_client()
+        # Annotations arriving from here on schedule a fresh check instead of relying on this one
+        client.delete(consensus_pending_key(clip_id))
+        if client.set(consensus_inflight_key(clip_id), 1, nx=True, ex=settings.CONSENSUS_CHECK_INFLIGHT_SECONDS):
+            return True
+    except redis.RedisError as exc:
+        logger.warning(f"Checking consensus for clip {clip_id} without coalescing: {str(exc)}")
+        return True
+    
+    schedule_consensus_check(clip_id)
+    return False
+
+
+def end_consensus_check(clip_id):
+    try:
+        get_client().delete(consensus_inflight_key(clip_id))
+    except redis.RedisError as exc:
+        logger.warning(f"Could not clear consensus check flag for clip {clip_id}: {str(exc)}")
+
+
+def rebuild_queues():
+    """Replace every dialect queue with the database's pending tasks in one atomic swap"""
+    client = get_client()
+    started = timezone.now()
+    batch_size = settings.ANNOTATION_QUEUE_REBUILD_BATCH_SIZE
+    
+    keys = [queue_key()] + [queue_key(dialect) for dialect, _ in AudioClip.DIALECT_CHOICES]
+    staging = {key: f"{key}:rebuild" for key in keys}
+    client.delete(*staging.values())
+    
+    pending = AnnotationTask.objects.filter(status='pending').values_list(
+        'id', 'clip_id', 'dialect', 'priority', 'created_at'
+    )
+    
+    filled = set()
+    total = 0
+    pipe = client.pipeline(transaction=False)
+    for task_id, clip_id, dialect, priority, created_at in pending.iterator(chunk_size=batch_size):
+        member = task_member(task_id, clip_id, dialect)
+        score = task_score(priority, created_at)
+        pipe.zadd(staging[queue_key()], {member: score})
+        pipe.zadd(staging[queue_key(dialect)], {member: score})
+        filled.update([queue_key(), queue_key(dialect)])
+        total += 1
+        if total % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+    
+    swap = client.pipeline()
+    for key in keys:
+        if key in filled:
+            swap.rename(staging[key], key)
+        else:
+            swap.delete(key)
+    swap.set(BUILT_KEY, timezone.now().isoformat())
+    swap.delete(REBUILD_LOCK_KEY)
+    swap.execute()
+    
+    # Tasks enqueued while the snapshot was read went to the replaced keys; add them to the new ones
+    enqueue_tasks(AnnotationTask.objects.filter(status='pending', updated_at__gte=started - REBUILD_CATCH_UP))
+    
+    return total
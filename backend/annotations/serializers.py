@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Annotation, AnnotationTask, ConsensusResult
-from audio.serializers import AudioClipListSerializer
+from audio.serializers import AudioClipListSerializer, AudioClipPrefetchSerializer
 from users.serializers import UserProfileSerializer
 
 
@@ -37,7 +37,7 @@ class AnnotationCreateSerializer(serializers.ModelSerializer):
         if Annotation.objects.filter(clip=clip, annotator=user).exists():
             raise serializers.ValidationError("You have already annotated this clip")
         
-        if clip.uploader == user:
+        if clip.uploader_id == user.id:
             raise serializers.ValidationError("You cannot annotate your own clip")
         
         if clip.status not in ['in_annotation', 'pending']:
@@ -54,10 +54,22 @@ class AnnotationTaskSerializer(serializers.ModelSerializer):
         model = AnnotationTask
         fields = [
             'id', 'clip', 'clip_info', 'assigned_to', 'assigned_to_info',
-            'status', 'priority', 'assigned_at', 'completed_at',
-            'created_at', 'updated_at'
+            'status', 'dialect', 'priority', 'assigned_at', 'lease_expires_at',
+            'completed_at', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['assigned_to', 'assigned_at', 'completed_at']
+        read_only_fields = ['assigned_to', 'dialect', 'assigned_at', 'lease_expires_at', 'completed_at']
+
+
+class AnnotationTaskPrefetchSerializer(serializers.ModelSerializer):
+    clip_info = AudioClipPrefetchSerializer(source='clip', read_only=True)
+    
+    class Meta:
+        model = AnnotationTask
+        fields = ['id', 'clip', 'clip_info', 'status', 'priority', 'lease_expires_at']
+
+
+class TaskReleaseSerializer(serializers.Serializer):
+    tasks = serializers.ListField(child=serializers.UUIDField(), required=False)
 
 
 class ConsensusResultSerializer(serializers.ModelSerializer):
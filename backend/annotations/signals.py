@@ -0,0 +1,23 @@
+import logging
+import redis
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import AnnotationTask
+from .queue import enqueue_tasks
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=AnnotationTask)
+def enqueue_pending_task(sender, instance, **kwargs):
+    if instance.status != 'pending':
+        return
+    
+    def enqueue():
+        try:
+            enqueue_tasks([instance])
+        except redis.RedisError as exc:
+            logger.warning(f"Could not enqueue annotation task {instance.id}: {str(exc)}")
+    
+    transaction.on_commit(enqueue)
@@ -2,9 +2,12 @@ from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import F, Q
 import Levenshtein
 import logging
-from .models import Annotation, ConsensusResult
+import time
+from datetime import timedelta
+from .models import Annotation, AnnotationTask, ConsensusResult, SimilarityCache, ConsensusEvent
 from audio.models import AudioClip
 
 logger = logging.getLogger(__name__)
@@ -25,126 +28,297 @@ def calculate_normalized_levenshtein_similarity(str1, str2):
     return round(similarity, 2)
 
 
+def condensed_index(i, j):
+    return j * (j - 1) // 2 + i
+
+
+def extend_similarities(cache, annotations):
+    """Add pairs for annotations the cache has not seen; each costs one comparison per annotation already cached"""
+    by_id = {str(ann.id): ann for ann in annotations}
+    
+    # Deleted or edited annotations invalidate their rows, so start over
+    stale = any(annotation_id not in by_id for annotation_id in cache.annotation_ids) or (
+        cache.updated_at and any(
+            by_id[annotation_id].updated_at > cache.updated_at for annotation_id in cache.annotation_ids
+        )
+    )
+    if stale:
+        cache.annotation_ids, cache.pair_similarities, cache.similarity_sums = [], [], []
+    
+    known = set(cache.annotation_ids)
+    added = 0
+    
+    for ann in annotations:
+        if str(ann.id) in known:
+            continue
+        
+        row = [
+            calculate_normalized_levenshtein_similarity(by_id[annotation_id].transcription, ann.transcription)
+            for annotation_id in cache.annotation_ids
+        ]
+        
+        for i, similarity in enumerate(row):
+            cache.similarity_sums[i] += similarity
+        cache.similarity_sums.append(sum(row))
+        cache.pair_similarities.extend(row)
+        cache.annotation_ids.append(str(ann.id))
+        added += 1
+    
+    return added
+
+
+def summarize_similarities(cache, annotations):
+    """Pick the most central transcription from cached similarities"""
+    n = len(cache.annotation_ids)
+    if n < 2:
+        return None, 0.0, {}
+    
+    by_id = {str(ann.id): ann for ann in annotations}
+    
+    similarity_matrix = {
+        f"{i}-{j}": cache.pair_similarities[condensed_index(i, j)]
+        for j in range(n) for i in range(j)
+    }
+    average_similarity = sum(cache.pair_similarities) / len(cache.pair_similarities)
+    
+    # Ties go to the most recent annotation
+    best_idx = max(range(n), key=lambda i: (cache.similarity_sums[i], i))
+    final_transcription = by_id[cache.annotation_ids[best_idx]].transcription
+    
+    return final_transcription, average_similarity, similarity_matrix
+
+
 def compute_consensus(annotations):
     """Compute consensus from multiple annotations using pairwise similarity"""
     if len(annotations) < settings.REQUIRED_ANNOTATIONS:
         return None, 0.0, {}
     
-    transcriptions = [ann.transcription for ann in annotations]
-    n = len(transcriptions)
+    cache = SimilarityCache()
+    extend_similarities(cache, annotations)
+    return summarize_similarities(cache, annotations)
+
+
+def agrees_early(clip, final_transcription, consensus_score):
+    """Whether fewer than REQUIRED_ANNOTATIONS annotations agree strongly enough to validate the clip"""
+    if consensus_score >= settings.ANNOTATION_EARLY_STOP_SIMILARITY:
+        return True
     
-    similarity_matrix = {}
-    total_similarity = 0
-    comparison_count = 0
+    # A confident ASR draft that matches the annotators counts as a further vote
+    asr_confident = (
+        clip.asr_draft_transcription
+        and (clip.asr_confidence_score or 0) >= settings.ANNOTATION_EARLY_STOP_ASR_CONFIDENCE
+    )
+    return bool(
+        asr_confident
+        and consensus_score >= settings.CONSENSUS_THRESHOLD
+        and calculate_normalized_levenshtein_similarity(
+            final_transcription, clip.asr_draft_transcription
+        ) >= settings.CONSENSUS_THRESHOLD
+    )
+
+
+def request_tiebreak_annotation(clip, annotation_count):
+    """Open one more task for a clip the annotators disagree on, up to ANNOTATION_MAX_ANNOTATIONS"""
+    if annotation_count >= settings.ANNOTATION_MAX_ANNOTATIONS:
+        logger.info(f"Clip {clip.id} reached {annotation_count} annotations without consensus")
+        return
     
-    for i in range(n):
-        for j in range(i + 1, n):
-            similarity = calculate_normalized_levenshtein_similarity(
-                transcriptions[i],
-                transcriptions[j]
-            )
-            similarity_matrix[f"{i}-{j}"] = similarity
-            total_similarity += similarity
-            comparison_count += 1
+    # Only open work counts: lapsed leases will be re-opened by the sweeper, not completed
+    open_tasks = Q(status='pending') | Q(status='assigned', lease_expires_at__gt=timezone.now())
+    if AnnotationTask.objects.filter(open_tasks, clip=clip).exists():
+        return
+    
+    # Disputed clips jump the queue so they do not linger half-annotated
+    AnnotationTask.objects.create(
+        clip=clip,
+        dialect=clip.dialect,
+        priority=(1 if clip.is_seed_data else 0) + 1
+    )
+    logger.info(f"Requested annotation {annotation_count + 1} for disputed clip {clip.id}")
+
+
+def evaluate_consensus(clip_id):
+    """Score the clip's current annotations and, if they agree, validate it"""
+    clip = AudioClip.objects.get(id=clip_id)
     
-    if comparison_count == 0:
-        return None, 0.0, similarity_matrix
+    if clip.consensus_reached:
+        logger.info(f"Clip {clip_id} already reached consensus")
+        return
     
-    average_similarity = total_similarity / comparison_count
+    # Similarities are computed before taking the clip lock; only the status transition holds it
+    annotations = list(clip.annotations.order_by('created_at'))
     
-    transcription_scores = {}
-    for i, trans in enumerate(transcriptions):
-        score = 0
-        count = 0
-        for j in range(n):
-            if i != j:
-                key = f"{min(i,j)}-{max(i,j)}"
-                score += similarity_matrix.get(key, 0)
-                count += 1
-        transcription_scores[i] = score / count if count > 0 else 0
+    if len(annotations) < settings.ANNOTATION_EARLY_STOP_MIN_ANNOTATIONS:
+        logger.info(f"Clip {clip_id} needs more annotations: {len(annotations)}/{settings.REQUIRED_ANNOTATIONS}")
+        return
     
-    best_idx = max(transcription_scores, key=transcription_scores.get)
-    final_transcription = transcriptions[best_idx]
+    cache, _ = SimilarityCache.objects.get_or_create(clip=clip)
+    if extend_similarities(cache, annotations):
+        cache.save()
     
-    return final_transcription, average_similarity, similarity_matrix
+    final_transcription, consensus_score, similarity_matrix = summarize_similarities(cache, annotations)
+    
+    if final_transcription is None:
+        logger.error(f"Failed to compute consensus for clip {clip_id}")
+        return
+    
+    if len(annotations) < settings.REQUIRED_ANNOTATIONS and not agrees_early(clip, final_transcription, consensus_score):
+        logger.info(f"Clip {clip_id} needs more annotations: {len(annotations)}/{settings.REQUIRED_ANNOTATIONS}")
+        return
+    
+    reached = consensus_score >= settings.CONSENSUS_THRESHOLD
+    lock_ms = apply_consensus(clip_id, annotations, final_transcription, consensus_score, similarity_matrix)
+    if lock_ms is None:
+        return
+    
+    if reached:
+        logger.info(f"Consensus reached for clip {clip_id}: {consensus_score}% (lock held {lock_ms:.1f}ms)")
+    else:
+        logger.info(
+            f"Consensus not reached for clip {clip_id}: {consensus_score}% < {settings.CONSENSUS_THRESHOLD}% "
+            f"(lock held {lock_ms:.1f}ms)"
+        )
 
 
-@shared_task(bind=True, max_retries=3)
-def check_consensus_and_reward(self, clip_id):
-    """Check if consensus is reached and trigger reward distribution"""
-    try:
-        with transaction.atomic():
-            clip = AudioClip.objects.select_for_update().get(id=clip_id)
-            
-            annotations = list(clip.annotations.all())
-            
-            if len(annotations) < settings.REQUIRED_ANNOTATIONS:
-                logger.info(f"Clip {clip_id} needs more annotations: {len(annotations)}/{settings.REQUIRED_ANNOTATIONS}")
-                return
-            
-            final_transcription, consensus_score, similarity_matrix = compute_consensus(annotations)
-            
-            if final_transcription is None:
-                logger.error(f"Failed to compute consensus for clip {clip_id}")
-                return
+def apply_consensus(clip_id, annotations, final_transcription, consensus_score, similarity_matrix):
+    """Write an already computed consensus under the clip lock; returns the lock time in ms, or None if stale"""
+    reached = consensus_score >= settings.CONSENSUS_THRESHOLD
+    
+    with transaction.atomic():
+        locked_at = time.monotonic()
+        clip = AudioClip.objects.select_for_update().get(id=clip_id)
+        
+        if clip.consensus_reached:
+            logger.info(f"Clip {clip_id} already reached consensus")
+            return None
+        if clip.annotation_count > len(annotations):
+            logger.info(f"Clip {clip_id} gained annotations during the check; deferring to the newer check")
+            return None
+        
+        consensus_result, created = ConsensusResult.objects.update_or_create(
+            clip=clip,
+            defaults={
+                'final_transcription': final_transcription,
+                'consensus_score': consensus_score,
+                'annotation_count': len(annotations),
+                'similarity_matrix': similarity_matrix,
+            }
+        )
+        
+        if created:
+            # A fresh result has no links to diff against, so add them without reading any back
+            consensus_result.contributing_annotations.add(*annotations)
+        
+        fields = {
+            'final_transcription': final_transcription,
+            'consensus_similarity': consensus_score,
+            'status': 'validated' if reached else 'in_annotation',
+            'updated_at': timezone.now(),
+        }
+        
+        if reached:
+            fields.update(consensus_reached=True, validated_at=timezone.now())
             
-            consensus_result, created = ConsensusResult.objects.update_or_create(
-                clip=clip,
-                defaults={
-                    'final_transcription': final_transcription,
-                    'consensus_score': consensus_score,
-                    'annotation_count': len(annotations),
-                    'similarity_matrix': similarity_matrix,
-                }
+            Annotation.objects.filter(id__in=[ann.id for ann in annotations]).update(
+                validated=True,
+                is_consensus=True
             )
             
-            if created:
-                consensus_result.contributing_annotations.set(annotations)
-            
-            clip.final_transcription = final_transcription
-            clip.consensus_similarity = consensus_score
-            
-            if consensus_score >= settings.CONSENSUS_THRESHOLD:
-                clip.consensus_reached = True
-                clip.status = 'validated'
-                clip.validated_at = timezone.now()
-                
-                for ann in annotations:
-                    ann.validated = True
-                    ann.is_consensus = True
-                    ann.save(update_fields=['validated', 'is_consensus'])
-                
-                clip.uploader.total_contributions += 1
-                clip.uploader.save(update_fields=['total_contributions'])
-                
-                clip.uploader.add_points(10)
-                
-                from users.utils import check_and_award_badges
-                check_and_award_badges(clip.uploader)
-                
-                from rewards.tasks import create_and_distribute_rewards
-                create_and_distribute_rewards.delay(str(clip_id))
-                
-                logger.info(f"Consensus reached for clip {clip_id}: {consensus_score}%")
-            else:
-                clip.status = 'in_annotation'
-                logger.info(f"Consensus not reached for clip {clip_id}: {consensus_score}% < {settings.CONSENSUS_THRESHOLD}%")
+            cancelled = AnnotationTask.objects.filter(clip=clip, status='pending').update(
+                status='cancelled',
+                updated_at=timezone.now()
+            )
+            if cancelled:
+                logger.info(f"Cancelled {cancelled} unneeded annotation tasks for clip {clip_id}")
             
-            clip.save()
+            # The outbox row commits with the validation; the beat relay delivers it if this nudge never does
+            ConsensusEvent.objects.create(clip_id=clip_id, event_type='consensus_reached')
+            transaction.on_commit(lambda: relay_consensus_events.delay(), robust=True)
+        else:
+            request_tiebreak_annotation(clip, len(annotations))
+        
+        AudioClip.objects.filter(id=clip_id).update(**fields)
     
+    return (time.monotonic() - locked_at) * 1000
+
+
+@shared_task(bind=True, max_retries=3)
+def check_consensus_and_reward(self, clip_id):
+    """Check if consensus is reached and trigger reward distribution"""
+    from .queue import begin_consensus_check, end_consensus_check
+    
+    if not begin_consensus_check(clip_id):
+        return
+    
+    try:
+        evaluate_consensus(clip_id)
     except AudioClip.DoesNotExist:
         logger.error(f"AudioClip {clip_id} not found")
     except Exception as exc:
         logger.error(f"Error checking consensus for clip {clip_id}: {str(exc)}")
         raise self.retry(exc=exc, countdown=60)
+    finally:
+        end_consensus_check(clip_id)
+
+
+@shared_task
+def relay_consensus_events():
+    """Publish outbox events that never reached the broker, or whose delivery was never processed"""
+    redeliver_before = timezone.now() - timedelta(seconds=settings.CONSENSUS_OUTBOX_REDELIVER_SECONDS)
+    events = ConsensusEvent.objects.filter(processed_at__isnull=True).filter(
+        Q(published_at__isnull=True) | Q(published_at__lt=redeliver_before)
+    ).values_list('id', flat=True)[:settings.CONSENSUS_OUTBOX_BATCH_SIZE]
+    
+    relayed = 0
+    for event_id in events:
+        try:
+            publish_consensus_reached.delay(str(event_id))
+        except Exception as e:
+            # Left unpublished; the next relay run tries again
+            logger.error(f"Could not publish consensus event {event_id}: {str(e)}")
+            break
+        
+        ConsensusEvent.objects.filter(id=event_id).update(
+            published_at=timezone.now(),
+            publish_attempts=F('publish_attempts') + 1
+        )
+        relayed += 1
+    
+    if relayed:
+        logger.info(f"Relayed {relayed} consensus events")
+    return relayed
+
+
+@shared_task
+def publish_consensus_reached(event_id):
+    """Apply the uploader's counters, points and badges for a validated clip and start reward distribution"""
+    from users.models import User
+    from users.utils import check_and_award_badges
+    from rewards.tasks import create_and_distribute_rewards
+    
+    with transaction.atomic():
+        # Relays deliver at least once; only the first delivery to mark the event applies it
+        if not ConsensusEvent.objects.filter(id=event_id, processed_at__isnull=True).update(processed_at=timezone.now()):
+            logger.info(f"Consensus event {event_id} already processed")
+            return
+        
+        clip_id = ConsensusEvent.objects.filter(id=event_id).values_list('clip_id', flat=True).get()
+        uploader_id = AudioClip.objects.filter(id=clip_id).values_list('uploader_id', flat=True).get()
+        
+        User.objects.filter(id=uploader_id).update(total_contributions=F('total_contributions') + 1)
+        
+        uploader = User.objects.get(id=uploader_id)
+        uploader.add_points(10)
+        check_and_award_badges(uploader)
+        
+        # Inside the transaction so a broker failure un-marks the event for the next relay
+        create_and_distribute_rewards.delay(str(clip_id))
 
 
 @shared_task
 def create_annotation_tasks_for_clip(clip_id):
     """Create annotation tasks for a new clip"""
     try:
-        from .models import AnnotationTask
-        
         clip = AudioClip.objects.get(id=clip_id)
         
         if clip.status not in ['pending', 'in_annotation']:
@@ -159,6 +333,7 @@ def create_annotation_tasks_for_clip(clip_id):
         for i in range(required_annotations):
             AnnotationTask.objects.create(
                 clip=clip,
+                dialect=clip.dialect,
                 priority=1 if clip.is_seed_data else 0
             )
         
@@ -168,3 +343,33 @@ def create_annotation_tasks_for_clip(clip_id):
         logger.error(f"AudioClip {clip_id} not found")
     except Exception as exc:
         logger.error(f"Error creating annotation tasks for clip {clip_id}: {str(exc)}")
+
+
+@shared_task
+def rebuild_annotation_queue():
+    """Rebuild the Redis dispatch queues from pending tasks in the database"""
+    from .queue import rebuild_queues
+    
+    total = rebuild_queues()
+    logger.info(f"Rebuilt annotation queue with {total} pending tasks")
+
+
+@shared_task
+def release_expired_leases():
+    """Return abandoned assigned tasks to the pending pool in one bulk update"""
+    from .queue import expired_leases, release_tasks
+    
+    now = timezone.now()
+    expired = expired_leases(now)
+    
+    claim_ages = [(now - assigned_at).total_seconds() for assigned_at in expired.values_list('assigned_at', flat=True)]
+    if not claim_ages:
+        return
+    
+    released = release_tasks(expired)
+    
+    mean_claim_age = sum(claim_ages) / len(claim_ages)
+    logger.info(
+        f"Released {released} expired annotation leases "
+        f"(mean claim age {mean_claim_age:.0f}s, {sum(claim_ages):.0f} task-seconds withheld from the queue)"
+    )
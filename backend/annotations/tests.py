@@ -0,0 +1,280 @@
+from datetime import timedelta
+from unittest import mock
+import fakeredis
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from users.models import User
+from audio.models import AudioClip
+from . import queue
+from .models import Annotation, AnnotationTask, ConsensusEvent
+from .tasks import (
+    apply_consensus, evaluate_consensus, publish_consensus_reached, relay_consensus_events, release_expired_leases
+)
+from .views import AnnotationViewSet
+
+
+class AnnotationTestCase(TestCase):
+    def setUp(self):
+        self.uploader = User.objects.create_user(username='uploader', email='uploader@example.com', password='pass')
+        self.annotators = [
+            User.objects.create_user(username=f'annotator{i}', email=f'annotator{i}@example.com', password='pass')
+            for i in range(3)
+        ]
+        self.clip = AudioClip.objects.create(
+            uploader=self.uploader,
+            audio_file='audio_clips/clip.wav',
+            dialect='sheng',
+            duration_seconds=3.0,
+            sample_rate=16000,
+            file_size_bytes=96000,
+            consent_given=True,
+            consent_timestamp=timezone.now(),
+            status='in_annotation'
+        )
+    
+    def create_clip(self, status='in_annotation'):
+        return AudioClip.objects.create(
+            uploader=self.uploader,
+            audio_file='audio_clips/other.wav',
+            dialect='sheng',
+            duration_seconds=3.0,
+            sample_rate=16000,
+            file_size_bytes=96000,
+            consent_given=True,
+            consent_timestamp=timezone.now(),
+            status=status
+        )
+    
+    def annotate(self, transcription='habari yako leo'):
+        annotations = [
+            Annotation.objects.create(
+                clip=self.clip, annotator=annotator, transcription=transcription, quality_rating='good'
+            )
+            for annotator in self.annotators
+        ]
+        AudioClip.objects.filter(id=self.clip.id).update(annotation_count=len(annotations))
+        return annotations
+    
+    def submit(self, user, clip, transcription='habari yako leo'):
+        request = APIRequestFactory().post(
+            '/api/annotations/annotations/',
+            {'clip': str(clip.id), 'transcription': transcription, 'quality_rating': 'good'},
+            format='json'
+        )
+        # The user instance is used as loaded, so a stale copy stands in for a concurrent request
+        force_authenticate(request, user=user)
+        return AnnotationViewSet.as_view({'post': 'create'})(request)
+
+
+class ApplyConsensusTests(AnnotationTestCase):
+    def test_locked_section_query_budget(self):
+        annotations = self.annotate()
+        AnnotationTask.objects.create(clip=self.clip)
+        
+        # Savepoint pair, lock, result upsert (read, insert, two savepoint pairs), one contributor
+        # insert, bulk annotation and task updates, outbox row, clip update; none scale with annotations
+        with self.assertNumQueries(14):
+            lock_ms = apply_consensus(self.clip.id, annotations, 'habari yako leo', 100.0, {})
+        
+        self.assertIsNotNone(lock_ms)
+        self.clip.refresh_from_db()
+        self.assertEqual(self.clip.status, 'validated')
+        self.assertEqual(AnnotationTask.objects.get(clip=self.clip).status, 'cancelled')
+    
+    def test_validation_writes_outbox_event_even_when_broker_is_down(self):
+        annotations = self.annotate()
+        
+        with mock.patch('annotations.tasks.relay_consensus_events.delay', side_effect=ConnectionError):
+            with self.captureOnCommitCallbacks(execute=True):
+                apply_consensus(self.clip.id, annotations, 'habari yako leo', 100.0, {})
+        
+        event = ConsensusEvent.objects.get(clip=self.clip)
+        self.assertIsNone(event.published_at)
+        
+        with mock.patch('annotations.tasks.publish_consensus_reached.delay') as publish:
+            self.assertEqual(relay_consensus_events(), 1)
+        
+        publish.assert_called_once_with(str(event.id))
+        event.refresh_from_db()
+        self.assertIsNotNone(event.published_at)
+        self.assertEqual(relay_consensus_events(), 0)
+
+
+@override_settings(ANNOTATION_QUEUE_ENABLED=False)
+class TiebreakTests(AnnotationTestCase):
+    @mock.patch('annotations.views.schedule_consensus_check')
+    def test_disagreement_opens_exactly_one_priority_task(self, schedule_consensus_check):
+        transcriptions = ['habari yako leo', 'ninakwenda sokoni kesho', 'mvua imenyesha sana']
+        for annotator, transcription in zip(self.annotators, transcriptions):
+            task = AnnotationTask.objects.create(clip=self.clip)
+            AnnotationTask.objects.filter(id=task.id).update(**queue.lease_fields(annotator))
+            self.assertEqual(self.submit(annotator, self.clip, transcription).status_code, 201)
+        
+        # A lapsed lease held elsewhere is work the sweeper will re-open, not work in progress
+        absentee = User.objects.create_user(username='absentee', email='absentee@example.com', password='pass')
+        lapsed = AnnotationTask.objects.create(clip=self.clip)
+        lease = queue.lease_fields(absentee)
+        lease['lease_expires_at'] = timezone.now() - timedelta(minutes=1)
+        AnnotationTask.objects.filter(id=lapsed.id).update(**lease)
+        
+        evaluate_consensus(self.clip.id)
+        evaluate_consensus(self.clip.id)
+        
+        opened = AnnotationTask.objects.filter(clip=self.clip, status='pending')
+        self.assertEqual(opened.count(), 1)
+        self.assertEqual(opened.get().priority, 1)
+        self.assertEqual(AnnotationTask.objects.filter(clip=self.clip, status='completed').count(), 3)
+
+
+class PublishConsensusReachedTests(AnnotationTestCase):
+    def test_duplicate_delivery_is_applied_once(self):
+        event = ConsensusEvent.objects.create(clip=self.clip)
+        
+        with mock.patch('rewards.tasks.create_and_distribute_rewards.delay') as rewards:
+            publish_consensus_reached(str(event.id))
+            publish_consensus_reached(str(event.id))
+        
+        self.uploader.refresh_from_db()
+        self.assertEqual(self.uploader.total_contributions, 1)
+        self.assertEqual(self.uploader.points, 10)
+        rewards.assert_called_once_with(str(self.clip.id))
+
+
+@override_settings(ANNOTATION_QUEUE_ENABLED=False)
+class AnnotationSubmitTests(AnnotationTestCase):
+    @mock.patch('annotations.views.schedule_consensus_check')
+    def test_submit_query_budget(self, schedule_consensus_check):
+        task = AnnotationTask.objects.create(clip=self.clip)
+        AnnotationTask.objects.filter(id=task.id).update(**queue.lease_fields(self.annotators[0]))
+        
+        # Validation reads (clip, duplicate check), savepoint pair, insert, clip and user
+        # counter updates, points update, task completion and the clip count re-read
+        with self.assertNumQueries(10):
+            response = self.submit(self.annotators[0], self.clip)
+        
+        self.assertEqual(response.status_code, 201)
+        schedule_consensus_check.assert_not_called()
+        
+        # A completed task is out of the lease sweeper's reach
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'completed')
+        self.assertIsNotNone(task.completed_at)
+    
+    @mock.patch('annotations.views.schedule_consensus_check')
+    def test_concurrent_submissions_keep_every_increment(self, schedule_consensus_check):
+        other_clip = self.create_clip(status='pending')
+        
+        # Both requests load the annotator before either writes, as two workers would
+        annotator = self.annotators[0]
+        first, second = User.objects.get(pk=annotator.pk), User.objects.get(pk=annotator.pk)
+        self.assertEqual(self.submit(first, self.clip).status_code, 201)
+        self.assertEqual(self.submit(second, other_clip).status_code, 201)
+        
+        # Two annotators on the same clip, each from a stale view of its count
+        self.assertEqual(self.submit(self.annotators[1], other_clip).status_code, 201)
+        
+        annotator.refresh_from_db()
+        self.assertEqual(annotator.total_validations, 2)
+        self.assertEqual(annotator.points, 10)
+        
+        other_clip.refresh_from_db()
+        self.assertEqual(other_clip.annotation_count, 2)
+        self.assertEqual(other_clip.status, 'in_annotation')
+        schedule_consensus_check.assert_called_once_with(other_clip.id)
+
+
+@override_settings(ANNOTATION_QUEUE_ENABLED=False)
+class ReleaseExpiredLeasesTests(AnnotationTestCase):
+    def lease(self, clip, annotator, expires_in):
+        task = AnnotationTask.objects.create(clip=clip)
+        lease = queue.lease_fields(annotator)
+        lease['lease_expires_at'] = timezone.now() + timedelta(seconds=expires_in)
+        AnnotationTask.objects.filter(id=task.id).update(**lease)
+        return task
+    
+    def test_sweeper_reopens_expired_leases_and_cancels_closed_clips(self):
+        expired = self.lease(self.clip, self.annotators[0], -60)
+        live = self.lease(self.clip, self.annotators[1], 600)
+        closed = self.lease(self.create_clip(status='validated'), self.annotators[2], -60)
+        
+        release_expired_leases()
+        
+        statuses = dict(AnnotationTask.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[expired.id], 'pending')
+        self.assertEqual(statuses[live.id], 'assigned')
+        self.assertEqual(statuses[closed.id], 'cancelled')
+        self.assertIsNone(AnnotationTask.objects.get(id=expired.id).assigned_to_id)
+
+
+@override_settings(ANNOTATION_QUEUE_ENABLED=True, ANNOTATION_QUEUE_SCAN_DEPTH=5)
+class AnnotationQueueTests(AnnotationTestCase):
+    def setUp(self):
+        super().setUp()
+        client = fakeredis.FakeRedis(decode_responses=True)
+        client.flushall()
+        for patcher in (
+            mock.patch('annotations.queue._client', client),
+            mock.patch('annotations.tasks.rebuild_annotation_queue.delay'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = client
+    
+    def queued_task_ids(self, dialect=None):
+        return {member.split(':')[0] for member in self.client.zrange(queue.queue_key(dialect), 0, -1)}
+    
+    def test_task_lost_at_the_head_leaves_its_clip_claimable(self):
+        first, second = (AnnotationTask.objects.create(clip=self.clip, priority=1) for _ in range(2))
+        queue.rebuild_queues()
+        
+        # Another annotator leased the head task without the queue hearing about it
+        AnnotationTask.objects.filter(id=first.id).update(**queue.lease_fields(self.annotators[0]))
+        
+        claimed = queue.claim_tasks(self.annotators[1])
+        
+        self.assertEqual([task.id for task in claimed], [second.id])
+        self.assertEqual(self.queued_task_ids(), set())
+    
+    def test_claim_falls_back_to_the_database_past_the_scan_depth(self):
+        annotator = self.annotators[0]
+        for _ in range(6):
+            clip = self.create_clip()
+            AnnotationTask.objects.create(clip=clip, priority=10)
+            Annotation.objects.create(clip=clip, annotator=annotator, transcription='habari', quality_rating='good')
+        below = AnnotationTask.objects.create(clip=self.clip)
+        queue.rebuild_queues()
+        
+        claimed = queue.claim_tasks(annotator)
+        
+        self.assertEqual([task.id for task in claimed], [below.id])
+        # The database claim takes the task out of the queue too, so no one else is offered it
+        self.assertNotIn(str(below.id), self.queued_task_ids())
+        self.assertNotIn(str(below.id), self.queued_task_ids('sheng'))
+        self.assertEqual(len(self.queued_task_ids()), 6)
+    
+    def test_rebuild_swaps_in_pending_tasks_and_keeps_late_enqueues(self):
+        pending = AnnotationTask.objects.create(clip=self.clip)
+        completed = AnnotationTask.objects.create(clip=self.clip, status='completed')
+        queue.enqueue_tasks([completed])
+        self.client.zadd(queue.queue_key('kiamu'), {queue.task_member(completed.id, self.clip.id, 'kiamu'): 0})
+        
+        late = []
+        real_pipeline = self.client.pipeline
+        
+        def pipeline(transaction=True):
+            # A task created after the snapshot was read is enqueued to the live keys just before the swap
+            if transaction and not late:
+                late.append(AnnotationTask.objects.create(clip=self.create_clip()))
+                queue.enqueue_tasks(late)
+            return real_pipeline(transaction=transaction)
+        
+        with mock.patch.object(self.client, 'pipeline', side_effect=pipeline):
+            self.assertEqual(queue.rebuild_queues(), 1)
+        
+        expected = {str(pending.id), str(late[0].id)}
+        self.assertEqual(self.queued_task_ids(), expected)
+        self.assertEqual(self.queued_task_ids('sheng'), expected)
+        self.assertFalse(self.client.exists(queue.queue_key('kiamu')))
+        self.assertEqual(self.client.keys('*:rebuild'), [])
+        self.assertTrue(self.client.exists(queue.BUILT_KEY))
@@ -3,15 +3,21 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q, Count
-from .models import Annotation, AnnotationTask, ConsensusResult
+from django.db import transaction
+from django.db.models import Q, Count, Avg, F, Value, Case, When, ExpressionWrapper, DurationField
 from audio.models import AudioClip
+from users.models import User
+from .models import Annotation, AnnotationTask, ConsensusResult
 from .serializers import (
-    AnnotationSerializer, AnnotationCreateSerializer,
-    AnnotationTaskSerializer, ConsensusResultSerializer
+    AnnotationSerializer, AnnotationCreateSerializer, AnnotationTaskSerializer,
+    AnnotationTaskPrefetchSerializer, TaskReleaseSerializer, ConsensusResultSerializer
 )
-from .tasks import check_consensus_and_reward
+from .queue import (
+    claim_next_task, claim_tasks, expired_leases, mark_seen, release_tasks, schedule_consensus_check
+)
+import redis
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,25 +47,41 @@ class AnnotationViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
-        annotation = serializer.save(annotator=self.request.user)
-        
-        clip = annotation.clip
-        clip.annotation_count = clip.annotations.count()
+        user = self.request.user
         
-        if clip.status == 'pending':
-            clip.status = 'in_annotation'
-        
-        clip.save(update_fields=['annotation_count', 'status'])
+        with transaction.atomic():
+            annotation = serializer.save(annotator=user)
+            clip = annotation.clip
+            
+            AudioClip.objects.filter(id=clip.id).update(
+                annotation_count=F('annotation_count') + 1,
+                status=Case(When(status='pending', then=Value('in_annotation')), default=F('status'))
+            )
+            User.objects.filter(id=user.id).update(total_validations=F('total_validations') + 1)
+            user.add_points(5)
+            
+            # The submission ends the annotator's lease; left assigned, the sweeper would re-open the task
+            now = timezone.now()
+            AnnotationTask.objects.filter(clip_id=clip.id, assigned_to=user, status='assigned').update(
+                status='completed',
+                completed_at=now,
+                updated_at=now
+            )
+            
+            # Concurrent submissions for the clip may have landed since it was loaded
+            clip.refresh_from_db(fields=['annotation_count', 'status'])
         
-        self.request.user.total_validations += 1
-        self.request.user.save(update_fields=['total_validations'])
+        user.total_validations += 1
         
-        self.request.user.add_points(5)
+        try:
+            mark_seen(user.id, clip.id)
+        except redis.RedisError as exc:
+            logger.warning(f"Could not mark clip {clip.id} seen: {str(exc)}")
         
-        if clip.annotation_count >= 3:
-            check_consensus_and_reward.delay(str(clip.id))
+        if clip.annotation_count >= settings.ANNOTATION_EARLY_STOP_MIN_ANNOTATIONS:
+            schedule_consensus_check(clip.id)
         
-        logger.info(f"Annotation created by {self.request.user.username} for clip {clip.id}")
+        logger.info(f"Annotation created by {user.username} for clip {clip.id}")
     
     @action(detail=False, methods=['get'])
     def my_annotations(self, request):
@@ -94,34 +116,9 @@ class AnnotationTaskViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def next_task(self, request):
-        user = request.user
-        dialect = request.query_params.get('dialect')
-        
-        already_annotated_clips = Annotation.objects.filter(
-            annotator=user
-        ).values_list('clip_id', flat=True)
-        
-        own_clips = AudioClip.objects.filter(uploader=user).values_list('id', flat=True)
-        
-        queryset = AnnotationTask.objects.filter(
-            status='pending'
-        ).exclude(
-            clip_id__in=already_annotated_clips
-        ).exclude(
-            clip_id__in=own_clips
-        ).select_related('clip')
-        
-        if dialect:
-            queryset = queryset.filter(clip__dialect=dialect)
-        
-        task = queryset.first()
+        task = claim_next_task(request.user, request.query_params.get('dialect'))
         
         if task:
-            task.assigned_to = user
-            task.status = 'assigned'
-            task.assigned_at = timezone.now()
-            task.save()
-            
             serializer = self.get_serializer(task)
             return Response(serializer.data)
         else:
@@ -130,6 +127,35 @@ class AnnotationTaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=False, methods=['get'])
+    def next_tasks(self, request):
+        try:
+            count = int(request.query_params.get('count', 1))
+        except ValueError:
+            return Response({'error': 'count must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        count = max(1, min(count, settings.ANNOTATION_PREFETCH_MAX_TASKS))
+        tasks = claim_tasks(request.user, request.query_params.get('dialect'), count)
+        
+        serializer = AnnotationTaskPrefetchSerializer(tasks, many=True, context={'request': request})
+        return Response({
+            'count': len(tasks),
+            'results': serializer.data
+        })
+    
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        serializer = TaskReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        tasks = AnnotationTask.objects.filter(assigned_to=request.user)
+        if 'tasks' in serializer.validated_data:
+            tasks = tasks.filter(id__in=serializer.validated_data['tasks'])
+        
+        released = release_tasks(tasks)
+        
+        return Response({'message': f'Released {released} tasks', 'released': released})
+    
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         task = self.get_object()
@@ -162,6 +188,7 @@ class AnnotationTaskViewSet(viewsets.ModelViewSet):
         task.status = 'pending'
         task.assigned_to = None
         task.assigned_at = None
+        task.lease_expires_at = None
         task.save()
         
         return Response({'message': 'Task skipped'})
@@ -185,14 +212,14 @@ def annotation_queue_stats(request):
     queryset = AnnotationTask.objects.filter(status='pending')
     
     if dialect:
-        queryset = queryset.filter(clip__dialect=dialect)
+        queryset = queryset.filter(dialect=dialect)
     
     total_pending = queryset.count()
     
-    by_dialect = {}
-    for d in ['sheng', 'kiamu', 'kibajuni']:
-        count = AnnotationTask.objects.filter(status='pending', clip__dialect=d).count()
-        by_dialect[d] = count
+    by_dialect = {d: 0 for d in ['sheng', 'kiamu', 'kibajuni']}
+    pending_counts = AnnotationTask.objects.filter(status='pending').values('dialect').annotate(count=Count('id'))
+    for row in pending_counts:
+        by_dialect[row['dialect']] = row['count']
     
     user_annotations_today = Annotation.objects.filter(
         annotator=request.user,
@@ -201,8 +228,17 @@ def annotation_queue_stats(request):
     
     user_total_annotations = request.user.total_validations
     
+    now = timezone.now()
+    claims = AnnotationTask.objects.filter(status='assigned').aggregate(
+        count=Count('id'),
+        mean_age=Avg(ExpressionWrapper(Value(now) - F('assigned_at'), output_field=DurationField()))
+    )
+    
     stats = {
         'total_pending_tasks': total_pending,
+        'assigned_tasks': claims['count'],
+        'stale_claims': expired_leases(now).count(),
+        'mean_claim_age_seconds': claims['mean_age'].total_seconds() if claims['mean_age'] else 0,
         'by_dialect': by_dialect,
         'user_annotations_today': user_annotations_today,
         'user_total_annotations': user_total_annotations,
@@ -0,0 +1,50 @@
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.reverse import reverse
+
+STREAM_TOKEN_SALT = 'audio.stream'
+
+
+def stream_token(clip_id, user_id):
+    """Token that stays identical within each AUDIO_STREAM_TOKEN_MAX_AGE window, so players can cache by URL"""
+    max_age = settings.AUDIO_STREAM_TOKEN_MAX_AGE
+    # Expire one full window after the current one ends, so every token lives at least max_age seconds
+    expires = (int(time.time()) // max_age + 2) * max_age
+    return signing.Signer(salt=STREAM_TOKEN_SALT).sign_object({'clip': str(clip_id), 'user': user_id, 'exp': expires})
+
+
+def signed_stream_url(audio_clip, request):
+    """Stream URL that a browser <audio> element can load without sending a bearer header"""
+    url = reverse('audio-clip-stream', args=[audio_clip.id], request=request)
+    
+    if request is None or not request.user.is_authenticated:
+        return url
+    
+    return f"{url}?token={stream_token(audio_clip.id, request.user.id)}"
+
+
+class StreamTokenAuthentication(BaseAuthentication):
+    """Authenticates a request by the signed, expiring per-clip token carried in its query string"""
+    
+    def authenticate(self, request):
+        token = request.query_params.get('token')
+        if not token:
+            return None
+        
+        try:
+            payload = signing.Signer(salt=STREAM_TOKEN_SALT).unsign_object(token)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed('Invalid or expired stream token')
+        
+        if not isinstance(payload.get('exp'), int) or payload['exp'] < time.time():
+            raise exceptions.AuthenticationFailed('Invalid or expired stream token')
+        
+        user = get_user_model().objects.filter(id=payload.get('user'), is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired stream token')
+        
+        return user, payload
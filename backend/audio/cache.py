@@ -0,0 +1,214 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR_NAME = 'locks'
+TEMP_DIR_NAME = 'tmp'
+USAGE_FILE_NAME = 'usage'
+DECODED_EXTENSION = '.pcm.wav'
+
+
+def get_cache_dir():
+    cache_dir = settings.AUDIO_CACHE_DIR
+    os.makedirs(os.path.join(cache_dir, LOCK_DIR_NAME), exist_ok=True)
+    os.makedirs(os.path.join(cache_dir, TEMP_DIR_NAME), exist_ok=True)
+    return cache_dir
+
+
+def cache_entry_path(digest, extension=''):
+    return os.path.join(get_cache_dir(), digest[:2], f"{digest}{extension}")
+
+
+def touch_entry(path):
+    """Mark a cache entry as recently used, returning False if it is missing"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def fill_lock(name):
+    """Serialize fills for one storage object across worker processes"""
+    lock_name = hashlib.sha1(name.encode('utf-8')).hexdigest()
+    lock_path = os.path.join(get_cache_dir(), LOCK_DIR_NAME, f"{lock_name}.lock")
+    
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def download_to_cache(field_file, extension, digest=None):
+    """Stream a stored file into the cache, returning its content hash and path"""
+    sha256 = hashlib.sha256()
+    temp_dir = os.path.join(get_cache_dir(), TEMP_DIR_NAME)
+    
+    with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp_file:
+        try:
+            with field_file.storage.open(field_file.name, 'rb') as source:
+                for block in iter(lambda: source.read(1024 * 1024), b''):
+                    sha256.update(block)
+                    temp_file.write(block)
+        except Exception:
+            os.unlink(temp_file.name)
+            raise
+    
+    if digest is None:
+        digest = sha256.hexdigest()
+    path = cache_entry_path(digest, extension)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(temp_file.name, path)
+    
+    return digest, path
+
+
+def scan_entries(cache_dir):
+    """Stat every cached file as (mtime, size, path)"""
+    entries = []
+    
+    for shard in os.scandir(cache_dir):
+        if not shard.is_dir() or shard.name in (LOCK_DIR_NAME, TEMP_DIR_NAME):
+            continue
+        for entry in os.scandir(shard.path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    return entries
+
+
+@contextmanager
+def usage_total():
+    """Hold the cache's running byte total, shared by every worker on the host, for update"""
+    cache_dir = get_cache_dir()
+    usage_path = os.path.join(cache_dir, USAGE_FILE_NAME)
+    
+    with fill_lock(USAGE_FILE_NAME):
+        try:
+            with open(usage_path) as usage_file:
+                total = {'bytes': int(usage_file.read() or 0)}
+        except (FileNotFoundError, ValueError):
+            # First fill on this host, or a torn write: count what is already on disk
+            total = {'bytes': sum(size for _, size, _ in scan_entries(cache_dir))}
+        
+        yield total
+        
+        with open(usage_path, 'w') as usage_file:
+            usage_file.write(str(total['bytes']))
+
+
+def record_fill(size, max_bytes=None):
+    """Add a new entry's size to the running total and evict only once it passes the cap"""
+    if max_bytes is None:
+        max_bytes = settings.AUDIO_CACHE_MAX_BYTES
+    
+    with usage_total() as total:
+        total['bytes'] += size
+        if total['bytes'] > max_bytes:
+            total['bytes'] = evict_entries(max_bytes)
+
+
+def evict_entries(max_bytes):
+    """Remove least recently used entries down to the low-water mark, returning the bytes left"""
+    target_bytes = int(max_bytes * settings.AUDIO_CACHE_LOW_WATER_RATIO)
+    # Paths handed out moments ago may be about to be opened by another worker
+    cutoff = time.time() - settings.AUDIO_CACHE_EVICT_GRACE_SECONDS
+    
+    entries = scan_entries(get_cache_dir())
+    total_bytes = sum(size for _, size, _ in entries)
+    
+    evicted = 0
+    for mtime, size, path in sorted(entries):
+        if total_bytes <= target_bytes or mtime > cutoff:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+        evicted += 1
+    
+    logger.info(f"Evicted {evicted} entries from audio cache")
+    return total_bytes
+
+
+def get_local_audio_path(audio_clip):
+    """Return a worker-local path to a clip's audio, fetching it from storage at most once"""
+    from .models import AudioClip
+    
+    extension = os.path.splitext(audio_clip.audio_file.name)[1].lower()
+    
+    if audio_clip.content_sha256:
+        path = cache_entry_path(audio_clip.content_sha256, extension)
+        if touch_entry(path):
+            return path
+    
+    with fill_lock(audio_clip.audio_file.name):
+        digest = AudioClip.objects.filter(pk=audio_clip.pk).values_list('content_sha256', flat=True).first()
+        if digest:
+            path = cache_entry_path(digest, extension)
+            if touch_entry(path):
+                audio_clip.content_sha256 = digest
+                return path
+        
+        # Archived copies keep the original recording's hash as their identity
+        archived_digest = digest if audio_clip.storage_tier != 'original' else None
+        digest, path = download_to_cache(audio_clip.audio_file, extension, digest=archived_digest)
+    
+    # The bytes just fetched are what storage holds, so their size is safe to lay out archives with;
+    # matching on the file name keeps a download racing a tier change from recording the old size
+    AudioClip.objects.filter(pk=audio_clip.pk, audio_file=audio_clip.audio_file.name).update(
+        content_sha256=digest,
+        stored_file_size_bytes=os.path.getsize(path)
+    )
+    audio_clip.content_sha256 = digest
+    
+    record_fill(os.path.getsize(path))
+    
+    return path
+
+
+def get_decoded_audio_path(audio_clip):
+    """Return a cached 16-bit mono PCM WAV decode of a clip's audio"""
+    from pydub import AudioSegment
+    from .models import AudioClip
+    
+    source_path = get_local_audio_path(audio_clip)
+    path = cache_entry_path(audio_clip.content_sha256, DECODED_EXTENSION)
+    
+    if touch_entry(path):
+        return path
+    
+    with fill_lock(path):
+        if touch_entry(path):
+            return path
+        
+        started = time.perf_counter()
+        audio = AudioSegment.from_file(source_path).set_channels(1).set_sample_width(2)
+        
+        temp_dir = os.path.join(get_cache_dir(), TEMP_DIR_NAME)
+        with tempfile.NamedTemporaryFile(dir=temp_dir, suffix='.wav', delete=False) as temp_file:
+            audio.export(temp_file, format='wav')
+        
+        os.replace(temp_file.name, path)
+        decode_latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    
+    AudioClip.objects.filter(pk=audio_clip.pk).update(decode_latency_ms=decode_latency_ms)
+    
+    record_fill(os.path.getsize(path))
+    
+    return path
+
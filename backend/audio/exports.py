@@ -0,0 +1,180 @@
+import os
+import logging
+import tempfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import F
+from .models import AudioClip
+
+logger = logging.getLogger(__name__)
+
+
+def clip_export_table():
+    schema = pa.schema([
+        ('id', pa.string()),
+        ('status', pa.string()),
+        ('source', pa.string()),
+        ('is_seed_data', pa.bool_()),
+        ('duration_seconds', pa.float64()),
+        ('sample_rate', pa.int32()),
+        ('final_transcription', pa.string()),
+        ('quality_score', pa.float64()),
+        ('annotation_count', pa.int32()),
+        ('consensus_reached', pa.bool_()),
+        ('consensus_similarity', pa.float64()),
+        ('consensus_score', pa.float64()),
+        ('uploader_id', pa.int64()),
+        ('uploader_total_contributions', pa.int32()),
+        ('uploader_level', pa.int32()),
+        ('uploader_points', pa.int64()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+        ('validated_at', pa.timestamp('us', tz='UTC')),
+    ])
+    
+    rows = AudioClip.objects.filter(status='validated').order_by('dialect', 'created_at').values(
+        'id', 'dialect', 'status', 'source', 'is_seed_data', 'duration_seconds', 'sample_rate',
+        'final_transcription', 'quality_score', 'annotation_count', 'consensus_reached',
+        'consensus_similarity', 'uploader_id', 'created_at', 'validated_at',
+        consensus_score=F('consensus_result__consensus_score'),
+        uploader_total_contributions=F('uploader__total_contributions'),
+        uploader_level=F('uploader__level'),
+        uploader_points=F('uploader__points'),
+    )
+    
+    return 'clips', schema, rows
+
+
+def annotation_export_table():
+    from annotations.models import Annotation
+    
+    schema = pa.schema([
+        ('id', pa.string()),
+        ('clip_id', pa.string()),
+        ('annotator_id', pa.int64()),
+        ('annotator_total_validations', pa.int32()),
+        ('transcription', pa.string()),
+        ('quality_rating', pa.string()),
+        ('quality_score', pa.float64()),
+        ('confidence_score', pa.float64()),
+        ('time_spent_seconds', pa.int32()),
+        ('validated', pa.bool_()),
+        ('is_consensus', pa.bool_()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+    ])
+    
+    rows = Annotation.objects.filter(clip__status='validated').order_by('clip__dialect', 'created_at').values(
+        'id', 'clip_id', 'annotator_id', 'transcription', 'quality_rating', 'quality_score',
+        'confidence_score', 'time_spent_seconds', 'validated', 'is_consensus', 'created_at',
+        dialect=F('clip__dialect'),
+        annotator_total_validations=F('annotator__total_validations'),
+    )
+    
+    return 'annotations', schema, rows
+
+
+class PartitionWriter:
+    """Writes Hive-style dialect=/month= Parquet files, one partition open at a time; partition values live only in the path"""
+    
+    def __init__(self, prefix, table_name, schema):
+        self.prefix = prefix
+        self.table_name = table_name
+        self.schema = schema
+        self.partition = None
+        self.writer = None
+        self.temp_path = None
+        self.files = []
+    
+    def write(self, partition, rows):
+        if partition != self.partition:
+            self.close()
+            self.open(partition)
+        
+        self.writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        self.files[-1]['rows'] += len(rows)
+    
+    def open(self, partition):
+        handle, self.temp_path = tempfile.mkstemp(suffix='.parquet')
+        os.close(handle)
+        
+        self.partition = partition
+        self.writer = pq.ParquetWriter(self.temp_path, self.schema, compression='zstd')
+        
+        dialect, month = partition
+        self.files.append({
+            'path': f"{self.prefix}/{self.table_name}/dialect={dialect}/month={month}/part-00000.parquet",
+            'dialect': dialect,
+            'month': month,
+            'rows': 0,
+        })
+    
+    def close(self):
+        if self.writer is None:
+            return
+        
+        self.writer.close()
+        try:
+            with open(self.temp_path, 'rb') as f:
+                self.files[-1]['path'] = default_storage.save(self.files[-1]['path'], File(f))
+        finally:
+            os.unlink(self.temp_path)
+        
+        self.writer = None
+        self.partition = None
+    
+    def abort(self):
+        if self.writer is None:
+            return
+        
+        self.writer.close()
+        os.unlink(self.temp_path)
+        self.writer = None
+        self.partition = None
+
+
+def export_table(prefix, table_name, schema, rows):
+    """Stream one queryset through a server-side cursor into partitioned Parquet files"""
+    batch_size = settings.PARQUET_EXPORT_BATCH_SIZE
+    writer = PartitionWriter(prefix, table_name, schema)
+    
+    batch = []
+    batch_partition = None
+    
+    try:
+        # Rows arrive ordered by dialect and time, so each partition is contiguous
+        for row in rows.iterator(chunk_size=batch_size):
+            row['id'] = str(row['id'])
+            if 'clip_id' in row:
+                row['clip_id'] = str(row['clip_id'])
+            partition = (row['dialect'], row['created_at'].strftime('%Y-%m'))
+            
+            if batch and (partition != batch_partition or len(batch) >= batch_size):
+                writer.write(batch_partition, batch)
+                batch = []
+            
+            batch.append(row)
+            batch_partition = partition
+        
+        if batch:
+            writer.write(batch_partition, batch)
+    except Exception:
+        writer.abort()
+        raise
+    
+    writer.close()
+    return writer.files
+
+
+def export_corpus(prefix):
+    files = {}
+    
+    for table_name, schema, rows in (clip_export_table(), annotation_export_table()):
+        files[table_name] = export_table(prefix, table_name, schema, rows)
+        logger.info(
+            f"Exported {sum(f['rows'] for f in files[table_name])} {table_name} rows "
+            f"to {len(files[table_name])} Parquet partitions"
+        )
+    
+    return files
@@ -0,0 +1,458 @@
+import os
+import struct
+import logging
+
+try:
+    import magic
+except ImportError:
+    magic = None
+
+logger = logging.getLogger(__name__)
+
+HEADER_READ_BYTES = 64 * 1024
+
+WAV_CODECS = {
+    0x0001: 'pcm',
+    0x0003: 'pcm_float',
+    0xFFFE: 'pcm',
+}
+
+WEBM_CODECS = {
+    'A_OPUS': 'opus',
+    'A_VORBIS': 'vorbis',
+}
+
+ALLOWED_CODECS = {
+    'wav': {'pcm', 'pcm_float'},
+    'ogg': {'opus', 'vorbis'},
+    'webm': {'opus', 'vorbis'},
+    'mp3': {'mp3'},
+}
+
+ACCEPTED_MIME_PREFIXES = ('audio/', 'video/webm', 'application/ogg', 'application/octet-stream')
+
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_AUDIO = 0xE1
+MKV_SAMPLING_FREQUENCY = 0xB5
+MKV_CHANNELS = 0x9F
+MKV_CLUSTER = 0x1F43B675
+MKV_CLUSTER_TIMECODE = 0xE7
+MKV_SIMPLE_BLOCK = 0xA3
+MKV_BLOCK_GROUP = 0xA0
+MKV_BLOCK = 0xA1
+MKV_TOP_LEVEL_IDS = {MKV_CLUSTER, 0x1C53BB6B, 0x1941A469, 0x1254C367, MKV_INFO, MKV_TRACKS, 0x114D9B74}
+
+
+class AudioHeaderError(ValueError):
+    pass
+
+
+class HeaderReader:
+    """Random-access reads over an uploaded file without loading all of it"""
+    
+    def __init__(self, file_obj, size=None):
+        self.file_obj = file_obj
+        if size is None:
+            size = getattr(file_obj, 'size', None)
+        if size is None:
+            position = file_obj.tell()
+            file_obj.seek(0, os.SEEK_END)
+            size = file_obj.tell()
+            file_obj.seek(position)
+        self.size = size
+    
+    def read_at(self, offset, length):
+        self.file_obj.seek(offset)
+        return self.file_obj.read(length)
+
+
+def detect_mime_type(head):
+    if magic is None:
+        return None
+    
+    try:
+        return magic.from_buffer(head, mime=True)
+    except Exception as e:
+        logger.warning(f"libmagic could not identify upload: {str(e)}")
+        return None
+
+
+def sniff_audio_header(file_obj, size=None):
+    """Read only container headers to find the real codec, duration and sample rate"""
+    reader = HeaderReader(file_obj, size)
+    head = reader.read_at(0, HEADER_READ_BYTES)
+    
+    try:
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            header = parse_wav_header(reader)
+        elif head[:4] == b'OggS':
+            header = parse_ogg_header(reader, head)
+        elif head[:4] == b'\x1a\x45\xdf\xa3':
+            header = parse_webm_header(reader)
+        elif head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+            header = parse_mp3_header(reader, head)
+        else:
+            raise AudioHeaderError('Unrecognized audio container')
+    except (struct.error, IndexError, TypeError):
+        raise AudioHeaderError('Audio file header is truncated or corrupt')
+    finally:
+        file_obj.seek(0)
+    
+    header['mime_type'] = detect_mime_type(head)
+    return header
+
+
+def check_audio_header(header, extension):
+    """Return the reasons a sniffed header does not match an acceptable upload"""
+    errors = []
+    container = header['container']
+    
+    if container != extension:
+        errors.append(f"File contents are {container} audio, not {extension}")
+    
+    if header['codec'] not in ALLOWED_CODECS.get(container, set()):
+        errors.append(f"Unsupported audio codec {header['codec']}")
+    
+    mime_type = header.get('mime_type')
+    if mime_type and not mime_type.startswith(ACCEPTED_MIME_PREFIXES):
+        errors.append(f"File was identified as {mime_type}")
+    
+    if not header['sample_rate'] or not header['channels']:
+        errors.append('Audio header does not declare a sample rate and channel count')
+    
+    if header['duration_seconds'] is None:
+        errors.append('Could not determine audio duration from the file header')
+    
+    return errors
+
+
+def parse_wav_header(reader):
+    offset = 12
+    fmt = None
+    
+    while offset + 8 <= reader.size:
+        chunk_id, chunk_size = struct.unpack('<4sI', reader.read_at(offset, 8))
+        
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', reader.read_at(offset + 8, 16))
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise AudioHeaderError('WAV data chunk precedes its format chunk')
+            
+            audio_format, channels, sample_rate, byte_rate, _, _ = fmt
+            if audio_format not in WAV_CODECS:
+                raise AudioHeaderError(f"Unsupported WAV encoding 0x{audio_format:04x}")
+            if byte_rate == 0:
+                raise AudioHeaderError('WAV header declares a zero byte rate')
+            
+            available = reader.size - offset - 8
+            if chunk_size in (0, 0xFFFFFFFF) or chunk_size > available:
+                chunk_size = available
+            
+            return {
+                'container': 'wav',
+                'codec': WAV_CODECS[audio_format],
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'duration_seconds': chunk_size / byte_rate,
+            }
+        
+        offset += 8 + chunk_size + (chunk_size & 1)
+    
+    raise AudioHeaderError('WAV file has no data chunk')
+
+
+def parse_ogg_page(data, offset):
+    if data[offset:offset + 4] != b'OggS':
+        raise AudioHeaderError('Invalid Ogg page')
+    
+    granule, serial = struct.unpack_from('<qI', data, offset + 6)
+    segment_count = data[offset + 26]
+    segments = data[offset + 27:offset + 27 + segment_count]
+    body_offset = offset + 27 + segment_count
+    
+    return granule, serial, data[body_offset:body_offset + sum(segments)]
+
+
+def parse_ogg_header(reader, head):
+    _, serial, packet = parse_ogg_page(head, 0)
+    
+    if packet[:8] == b'OpusHead':
+        channels, pre_skip, input_rate = struct.unpack_from('<BHI', packet, 9)
+        codec, granule_rate = 'opus', 48000
+        sample_rate = input_rate or 48000
+    elif packet[:7] == b'\x01vorbis':
+        channels, sample_rate = struct.unpack_from('<BI', packet, 11)
+        codec, granule_rate, pre_skip = 'vorbis', sample_rate, 0
+    else:
+        raise AudioHeaderError('Unsupported Ogg codec')
+    
+    tail_offset = max(0, reader.size - HEADER_READ_BYTES)
+    tail = reader.read_at(tail_offset, HEADER_READ_BYTES)
+    
+    last_granule = None
+    position = tail.rfind(b'OggS')
+    while position != -1:
+        try:
+            granule, page_serial, _ = parse_ogg_page(tail, position)
+        except (AudioHeaderError, struct.error):
+            granule, page_serial = -1, None
+        if page_serial == serial and granule >= 0:
+            last_granule = granule
+            break
+        position = tail.rfind(b'OggS', 0, position)
+    
+    duration_seconds = None
+    if last_granule is not None and granule_rate:
+        duration_seconds = max(0, last_granule - pre_skip) / granule_rate
+    
+    return {
+        'container': 'ogg',
+        'codec': codec,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'duration_seconds': duration_seconds,
+    }
+
+
+def read_vint(reader, offset, keep_marker=False):
+    first = reader.read_at(offset, 1)
+    if not first:
+        raise AudioHeaderError('Unexpected end of WebM file')
+    
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise AudioHeaderError('Invalid EBML variable-length integer')
+    
+    value = first if keep_marker else first & (mask - 1)
+    unknown = not keep_marker and value == mask - 1
+    for byte in reader.read_at(offset + 1, length - 1):
+        value = (value << 8) | byte
+        unknown = unknown and byte == 0xFF
+    
+    return value, length, None if unknown else value
+
+
+def read_element(reader, offset):
+    element_id, id_length, _ = read_vint(reader, offset, keep_marker=True)
+    _, size_length, size = read_vint(reader, offset + id_length)
+    return element_id, offset + id_length + size_length, size
+
+
+def iter_elements(reader, start, end):
+    offset = start
+    while offset < end:
+        element_id, data_offset, size = read_element(reader, offset)
+        yield element_id, data_offset, size
+        if size is None:
+            return
+        offset = data_offset + size
+
+
+def read_uint(reader, offset, size):
+    return int.from_bytes(reader.read_at(offset, size), 'big')
+
+
+def read_float(reader, offset, size):
+    return struct.unpack('>f' if size == 4 else '>d', reader.read_at(offset, size))[0]
+
+
+def parse_webm_header(reader):
+    element_id, data_offset, size = read_element(reader, 0)
+    if element_id != EBML_HEADER or size is None:
+        raise AudioHeaderError('Invalid EBML header')
+    
+    doc_type = None
+    for child_id, child_offset, child_size in iter_elements(reader, data_offset, data_offset + size):
+        if child_id == EBML_DOCTYPE:
+            doc_type = reader.read_at(child_offset, child_size).rstrip(b'\x00').decode('ascii', 'replace')
+    if doc_type not in ('webm', 'matroska'):
+        raise AudioHeaderError(f"Unsupported EBML document type {doc_type}")
+    
+    segment_id, segment_offset, segment_size = read_element(reader, data_offset + size)
+    if segment_id != MKV_SEGMENT:
+        raise AudioHeaderError('WebM file has no segment')
+    segment_end = reader.size if segment_size is None else min(reader.size, segment_offset + segment_size)
+    
+    timecode_scale = 1000000
+    duration = None
+    track = None
+    max_timecode = None
+    offset = segment_offset
+    
+    while offset < segment_end:
+        element_id, child_offset, child_size = read_element(reader, offset)
+        
+        if element_id == MKV_INFO:
+            for info_id, info_offset, info_size in iter_elements(reader, child_offset, child_offset + child_size):
+                if info_id == MKV_TIMECODE_SCALE:
+                    timecode_scale = read_uint(reader, info_offset, info_size)
+                elif info_id == MKV_DURATION:
+                    duration = read_float(reader, info_offset, info_size)
+        elif element_id == MKV_TRACKS:
+            track = track or parse_webm_audio_track(reader, child_offset, child_offset + child_size)
+        elif element_id == MKV_CLUSTER:
+            if duration is not None:
+                break
+            cluster_end, cluster_max = scan_webm_cluster(reader, child_offset, child_size, segment_end)
+            if cluster_max is not None:
+                max_timecode = cluster_max if max_timecode is None else max(max_timecode, cluster_max)
+            offset = cluster_end
+            continue
+        
+        if child_size is None:
+            break
+        offset = child_offset + child_size
+    
+    if track is None:
+        raise AudioHeaderError('WebM file has no audio track')
+    
+    if duration is None and max_timecode is not None:
+        duration = max_timecode
+    
+    return {
+        'container': 'webm',
+        'codec': track['codec'],
+        'sample_rate': track['sample_rate'],
+        'channels': track['channels'],
+        'duration_seconds': duration * timecode_scale / 1e9 if duration is not None else None,
+    }
+
+
+def parse_webm_audio_track(reader, start, end):
+    for element_id, entry_offset, entry_size in iter_elements(reader, start, end):
+        if element_id != MKV_TRACK_ENTRY:
+            continue
+        
+        track = {'type': None, 'codec': None, 'sample_rate': 8000, 'channels': 1}
+        for child_id, child_offset, child_size in iter_elements(reader, entry_offset, entry_offset + entry_size):
+            if child_id == MKV_TRACK_TYPE:
+                track['type'] = read_uint(reader, child_offset, child_size)
+            elif child_id == MKV_CODEC_ID:
+                codec_id = reader.read_at(child_offset, child_size).rstrip(b'\x00').decode('ascii', 'replace')
+                track['codec'] = WEBM_CODECS.get(codec_id, codec_id)
+            elif child_id == MKV_AUDIO:
+                for audio_id, audio_offset, audio_size in iter_elements(reader, child_offset, child_offset + child_size):
+                    if audio_id == MKV_SAMPLING_FREQUENCY:
+                        track['sample_rate'] = int(read_float(reader, audio_offset, audio_size))
+                    elif audio_id == MKV_CHANNELS:
+                        track['channels'] = read_uint(reader, audio_offset, audio_size)
+        
+        if track['type'] == 2:
+            return track
+    
+    return None
+
+
+def scan_webm_cluster(reader, start, size, segment_end):
+    """Find the latest block timecode in a cluster by walking element headers only"""
+    end = segment_end if size is None else start + size
+    cluster_timecode = 0
+    max_timecode = None
+    offset = start
+    
+    while offset < end:
+        element_id, data_offset, element_size = read_element(reader, offset)
+        
+        if size is None and element_id in MKV_TOP_LEVEL_IDS:
+            return offset, max_timecode
+        if element_size is None:
+            raise AudioHeaderError('Unsupported unknown-size WebM element')
+        
+        block_offset = None
+        if element_id == MKV_CLUSTER_TIMECODE:
+            cluster_timecode = read_uint(reader, data_offset, element_size)
+        elif element_id == MKV_SIMPLE_BLOCK:
+            block_offset = data_offset
+        elif element_id == MKV_BLOCK_GROUP:
+            for child_id, child_offset, _ in iter_elements(reader, data_offset, data_offset + element_size):
+                if child_id == MKV_BLOCK:
+                    block_offset = child_offset
+        
+        if block_offset is not None:
+            _, track_length, _ = read_vint(reader, block_offset)
+            relative = struct.unpack('>h', reader.read_at(block_offset + track_length, 2))[0]
+            timecode = cluster_timecode + relative
+            max_timecode = timecode if max_timecode is None else max(max_timecode, timecode)
+        
+        offset = data_offset + element_size
+    
+    return end, max_timecode
+
+
+def parse_mp3_header(reader, head):
+    offset = 0
+    if head[:3] == b'ID3':
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        offset = 10 + tag_size
+        head = reader.read_at(offset, 4096)
+    
+    offset_in_head = 0
+    while offset_in_head + 4 <= len(head):
+        if head[offset_in_head] == 0xFF and head[offset_in_head + 1] & 0xE0 == 0xE0:
+            break
+        offset_in_head += 1
+    else:
+        raise AudioHeaderError('No MP3 frame found')
+    
+    frame_offset = offset + offset_in_head
+    frame = reader.read_at(frame_offset, 200)
+    
+    version_bits = (frame[1] >> 3) & 0x03
+    layer_bits = (frame[1] >> 1) & 0x03
+    bitrate_index = frame[2] >> 4
+    rate_index = (frame[2] >> 2) & 0x03
+    channel_mode = frame[3] >> 6
+    
+    if version_bits == 1 or layer_bits != 1 or rate_index == 3 or bitrate_index in (0, 15):
+        raise AudioHeaderError('Unsupported MPEG audio frame')
+    
+    sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+    bitrate = MP3_BITRATES[1 if version_bits == 3 else 2][bitrate_index] * 1000
+    samples_per_frame = 1152 if version_bits == 3 else 576
+    channels = 1 if channel_mode == 3 else 2
+    
+    if version_bits == 3:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    
+    xing = frame[4 + side_info:8 + side_info]
+    if xing in (b'Xing', b'Info') and frame[11 + side_info] & 0x01:
+        frame_count = struct.unpack_from('>I', frame, 12 + side_info)[0]
+        duration_seconds = frame_count * samples_per_frame / sample_rate
+    else:
+        duration_seconds = (reader.size - frame_offset) * 8 / bitrate
+    
+    return {
+        'container': 'mp3',
+        'codec': 'mp3',
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'duration_seconds': duration_seconds,
+    }
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from audio.models import AudioClip
+from audio.tasks import generate_pronunciation_feedback_batch
+
+
+class Command(BaseCommand):
+    help = 'Generate pronunciation feedback for many clips in vectorized batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dialect', choices=[choice[0] for choice in AudioClip.DIALECT_CHOICES])
+        parser.add_argument('--seed-only', action='store_true', help='Only score seed data')
+        parser.add_argument('--missing-only', action='store_true', help='Skip clips that already have feedback')
+        parser.add_argument('--batch-size', type=int, default=settings.PRONUNCIATION_BATCH_SIZE)
+        parser.add_argument('--sync', action='store_true', help='Score in this process instead of queueing tasks')
+    
+    def handle(self, *args, **options):
+        clips = AudioClip.objects.exclude(status='rejected')
+        
+        if options['dialect']:
+            clips = clips.filter(dialect=options['dialect'])
+        if options['seed_only']:
+            clips = clips.filter(is_seed_data=True)
+        if options['missing_only']:
+            clips = clips.filter(pronunciation_feedback__isnull=True)
+        
+        # Similar durations batch together, so little of each batch is padding
+        clip_ids = clips.order_by('duration_seconds').values_list('id', flat=True)
+        
+        batches = 0
+        scored = 0
+        batch = []
+        for clip_id in clip_ids.iterator(chunk_size=2000):
+            batch.append(str(clip_id))
+            if len(batch) == options['batch_size']:
+                scored += self.dispatch(batch, options['sync'])
+                batches += 1
+                batch = []
+        
+        if batch:
+            scored += self.dispatch(batch, options['sync'])
+            batches += 1
+        
+        if options['sync']:
+            self.stdout.write(self.style.SUCCESS(f'Scored {scored} clips in {batches} batches'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Queued {batches} batches'))
+    
+    def dispatch(self, clip_ids, sync):
+        if sync:
+            return generate_pronunciation_feedback_batch(clip_ids)
+        
+        generate_pronunciation_feedback_batch.delay(clip_ids)
+        return 0
@@ -0,0 +1,270 @@
+from django.db import models
+from django.conf import settings
+from django.core.validators import FileExtensionValidator, MaxValueValidator
+import uuid
+
+
+class AudioClip(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('in_annotation', 'In Annotation'),
+        ('validated', 'Validated'),
+        ('rejected', 'Rejected'),
+    ]
+    
+    DIALECT_CHOICES = [
+        ('sheng', 'Sheng'),
+        ('kiamu', 'Kiamu'),
+        ('kibajuni', 'Kibajuni'),
+    ]
+    
+    SOURCE_CHOICES = [
+        ('recording', 'Recording'),
+        ('upload', 'Upload'),
+        ('seed', 'Seed'),
+    ]
+    
+    STORAGE_TIER_CHOICES = [
+        ('original', 'Original'),
+        ('flac', 'FLAC'),
+        ('opus', 'Opus'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploader = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='audio_clips')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='recording')
+    audio_file = models.FileField(
+        upload_to='audio_clips/%Y/%m/%d/',
+        validators=[FileExtensionValidator(allowed_extensions=['wav', 'mp3', 'ogg', 'webm'])]
+    )
+    s3_url = models.URLField(blank=True, null=True)
+    dialect = models.CharField(max_length=20, choices=DIALECT_CHOICES)
+    duration_seconds = models.FloatField(validators=[MaxValueValidator(20.0)])
+    sample_rate = models.IntegerField(default=16000)
+    channels = models.IntegerField(default=1)
+    file_size_bytes = models.BigIntegerField()
+    storage_tier = models.CharField(max_length=10, choices=STORAGE_TIER_CHOICES, default='original')
+    stored_file_size_bytes = models.BigIntegerField(blank=True, null=True)
+    decode_latency_ms = models.FloatField(blank=True, null=True)
+    tiered_at = models.DateTimeField(blank=True, null=True)
+    content_sha256 = models.CharField(max_length=64, blank=True, null=True)
+    acoustic_fingerprint = models.CharField(max_length=16, blank=True, null=True)
+    fingerprint_segment_0 = models.CharField(max_length=4, blank=True, null=True)
+    fingerprint_segment_1 = models.CharField(max_length=4, blank=True, null=True)
+    fingerprint_segment_2 = models.CharField(max_length=4, blank=True, null=True)
+    fingerprint_segment_3 = models.CharField(max_length=4, blank=True, null=True)
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='duplicates',
+        blank=True,
+        null=True
+    )
+    waveform_data = models.JSONField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    consent_given = models.BooleanField(default=False)
+    consent_text = models.TextField()
+    consent_timestamp = models.DateTimeField()
+    asr_draft_transcription = models.TextField(blank=True, null=True)
+    asr_confidence_score = models.FloatField(blank=True, null=True)
+    final_transcription = models.TextField(blank=True, null=True)
+    quality_score = models.FloatField(blank=True, null=True)
+    rejection_reasons = models.JSONField(blank=True, null=True)
+    annotation_count = models.IntegerField(default=0)
+    consensus_reached = models.BooleanField(default=False)
+    consensus_similarity = models.FloatField(blank=True, null=True)
+    is_seed_data = models.BooleanField(default=False)
+    metadata = models.JSONField(blank=True, null=True)
+    ingest_timings = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    validated_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'audio_clips'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['uploader', 'status']),
+            models.Index(fields=['dialect', 'status']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['content_sha256']),
+            models.Index(fields=['acoustic_fingerprint']),
+            models.Index(fields=['fingerprint_segment_0', 'duration_seconds']),
+            models.Index(fields=['fingerprint_segment_1', 'duration_seconds']),
+            models.Index(fields=['fingerprint_segment_2', 'duration_seconds']),
+            models.Index(fields=['fingerprint_segment_3', 'duration_seconds']),
+            models.Index(fields=['status', 'tiered_at', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.dialect} - {self.id} ({self.status})"
+    
+    def can_be_deleted_by(self, user):
+        return self.uploader == user and self.status in ['pending', 'rejected']
+    
+    def move_to_annotation_queue(self):
+        if self.status == 'pending' and self.consent_given:
+            self.status = 'in_annotation'
+            self.save(update_fields=['status', 'updated_at'])
+            return True
+        return False
+
+
+class PronunciationFeedback(models.Model):
+    audio_clip = models.OneToOneField(AudioClip, on_delete=models.CASCADE, related_name='pronunciation_feedback')
+    overall_score = models.FloatField()
+    clarity_score = models.FloatField()
+    fluency_score = models.FloatField()
+    pronunciation_issues = models.JSONField(blank=True, null=True)
+    improvement_suggestions = models.JSONField(blank=True, null=True)
+    phoneme_analysis = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'pronunciation_feedback'
+    
+    def __str__(self):
+        return f"Feedback for {self.audio_clip.id} - Score: {self.overall_score}"
+
+
+class UploadSession(models.Model):
+    STATUS_CHOICES = [
+        ('created', 'Created'),
+        ('uploaded', 'Uploaded'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    
+    METHOD_CHOICES = [
+        ('presigned', 'Presigned'),
+        ('resumable', 'Resumable'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploader = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    upload_method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='presigned')
+    storage_key = models.CharField(max_length=255, unique=True)
+    content_type = models.CharField(max_length=50)
+    file_size_bytes = models.BigIntegerField()
+    upload_offset = models.BigIntegerField(default=0)
+    chunk_digests = models.JSONField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='created')
+    clip_metadata = models.JSONField(blank=True, null=True)
+    audio_clip = models.OneToOneField(
+        AudioClip,
+        on_delete=models.SET_NULL,
+        related_name='upload_session',
+        blank=True,
+        null=True
+    )
+    error_message = models.TextField(blank=True, null=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['uploader', 'status']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"Upload {self.id} ({self.status})"
+    
+    @property
+    def is_expired(self):
+        from django.utils import timezone
+        return self.expires_at <= timezone.now()
+
+
+class Dataset(models.Model):
+    name = models.CharField(max_length=255)
+    description = models.TextField()
+    dialect = models.CharField(max_length=20, choices=AudioClip.DIALECT_CHOICES)
+    version = models.CharField(max_length=50)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        related_name='children',
+        blank=True,
+        null=True
+    )
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    total_clips = models.IntegerField(default=0)
+    total_duration_seconds = models.FloatField(default=0.0)
+    manifest_file = models.FileField(upload_to='datasets/', blank=True, null=True)
+    shard_index_file = models.FileField(upload_to='datasets/', blank=True, null=True)
+    validated_watermark = models.DateTimeField(blank=True, null=True)
+    metadata = models.JSONField(blank=True, null=True)
+    is_public = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'datasets'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+    
+    def version_chain(self):
+        """Versions from the full base build down to this one"""
+        chain = [self]
+        while chain[-1].parent_id:
+            chain.append(chain[-1].parent)
+        return chain[::-1]
+    
+    def materialized_clip_ids(self):
+        """Clip ids in this version, replaying the base rows and each delta in order"""
+        clip_ids = {}
+        for version in self.version_chain():
+            rows = DatasetClip.objects.filter(dataset=version).order_by('order').values_list('audio_clip_id', 'change')
+            for clip_id, change in rows.iterator():
+                if change == 'removed':
+                    clip_ids.pop(clip_id, None)
+                else:
+                    clip_ids[clip_id] = True
+        return list(clip_ids)
+
+
+class DatasetClip(models.Model):
+    CHANGE_CHOICES = [
+        ('added', 'Added'),
+        ('removed', 'Removed'),
+    ]
+    
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='clips')
+    audio_clip = models.ForeignKey(AudioClip, on_delete=models.CASCADE)
+    order = models.IntegerField(default=0)
+    change = models.CharField(max_length=10, choices=CHANGE_CHOICES, default='added')
+    
+    class Meta:
+        db_table = 'dataset_clips'
+        unique_together = ['dataset', 'audio_clip']
+        ordering = ['order']
+    
+    def __str__(self):
+        return f"{self.dataset.name} - Clip {self.order}"
+
+
+class BenchmarkResult(models.Model):
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='benchmark_results')
+    model_name = models.CharField(max_length=255)
+    model_version = models.CharField(max_length=100)
+    wer = models.FloatField()
+    cer = models.FloatField()
+    total_clips_tested = models.IntegerField()
+    average_latency_ms = models.FloatField(blank=True, null=True)
+    metadata = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'benchmark_results'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.model_name} - WER: {self.wer}%"
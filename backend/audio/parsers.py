@@ -0,0 +1,8 @@
+from rest_framework.parsers import BaseParser
+
+
+class UploadChunkParser(BaseParser):
+    media_type = 'application/offset+octet-stream'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read() if stream else b''
@@ -0,0 +1,222 @@
+from rest_framework import serializers
+from django.conf import settings
+from .models import AudioClip, PronunciationFeedback, Dataset, BenchmarkResult, UploadSession
+from .headers import sniff_audio_header, check_audio_header, AudioHeaderError
+from .utils import waveform_pyramid
+from .authentication import signed_stream_url
+import os
+from users.serializers import UserProfileSerializer
+
+
+class AudioClipSerializer(serializers.ModelSerializer):
+    uploader_info = UserProfileSerializer(source='uploader', read_only=True)
+    audio_url = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AudioClip
+        fields = [
+            'id', 'uploader', 'uploader_info', 'source', 'audio_file', 'audio_url',
+            'stream_url', 's3_url', 'dialect', 'duration_seconds', 'sample_rate', 'channels',
+            'file_size_bytes', 'storage_tier', 'content_sha256', 'waveform_data', 'status',
+            'consent_given', 'consent_text', 'consent_timestamp',
+            'asr_draft_transcription', 'asr_confidence_score', 'final_transcription',
+            'quality_score', 'rejection_reasons', 'duplicate_of', 'annotation_count',
+            'consensus_reached', 'consensus_similarity', 'is_seed_data', 'metadata',
+            'ingest_timings', 'created_at', 'updated_at', 'validated_at'
+        ]
+        read_only_fields = [
+            'uploader', 'storage_tier', 'content_sha256', 'status', 'asr_draft_transcription',
+            'asr_confidence_score', 'final_transcription', 'quality_score',
+            'rejection_reasons', 'duplicate_of', 'annotation_count',
+            'consensus_reached', 'consensus_similarity', 'ingest_timings', 'validated_at'
+        ]
+    
+    def get_audio_url(self, obj):
+        if obj.s3_url:
+            return obj.s3_url
+        request = self.context.get('request')
+        if obj.audio_file and request:
+            return request.build_absolute_uri(obj.audio_file.url)
+        return None
+    
+    def get_stream_url(self, obj):
+        return signed_stream_url(obj, self.context.get('request'))
+
+
+class AudioClipMetadataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AudioClip
+        fields = [
+            'dialect', 'duration_seconds', 'sample_rate', 'channels',
+            'file_size_bytes', 'consent_given', 'consent_text',
+            'consent_timestamp', 'source', 'waveform_data', 'metadata'
+        ]
+    
+    def validate_duration_seconds(self, value):
+        if value > 20:
+            raise serializers.ValidationError("Audio clip cannot exceed 20 seconds")
+        if value < 1:
+            raise serializers.ValidationError("Audio clip must be at least 1 second")
+        return value
+    
+    def validate_consent_given(self, value):
+        if not value:
+            raise serializers.ValidationError("Consent must be given to upload audio")
+        return value
+
+
+class AudioClipUploadSerializer(AudioClipMetadataSerializer):
+    audio_file = serializers.FileField()
+    
+    class Meta(AudioClipMetadataSerializer.Meta):
+        fields = ['audio_file'] + AudioClipMetadataSerializer.Meta.fields
+    
+    def validate_audio_file(self, value):
+        if value.size > settings.MAX_AUDIO_UPLOAD_BYTES:
+            raise serializers.ValidationError("Audio file size cannot exceed 10MB")
+        return value
+    
+    def validate(self, attrs):
+        audio_file = attrs['audio_file']
+        extension = os.path.splitext(audio_file.name)[1].lstrip('.').lower()
+        
+        try:
+            header = sniff_audio_header(audio_file)
+        except AudioHeaderError as e:
+            raise serializers.ValidationError({'audio_file': str(e)})
+        
+        errors = check_audio_header(header, extension)
+        if errors:
+            raise serializers.ValidationError({'audio_file': errors})
+        
+        try:
+            duration_seconds = self.validate_duration_seconds(round(header['duration_seconds'], 3))
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({'duration_seconds': e.detail})
+        
+        attrs['duration_seconds'] = duration_seconds
+        attrs['sample_rate'] = header['sample_rate']
+        attrs['channels'] = header['channels']
+        attrs['file_size_bytes'] = audio_file.size
+        attrs['stored_file_size_bytes'] = audio_file.size
+        
+        return attrs
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'upload_method', 'content_type', 'file_size_bytes', 'upload_offset',
+            'status', 'audio_clip', 'error_message', 'expires_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(settings.AUDIO_CONTENT_TYPES.values()))
+    file_size_bytes = serializers.IntegerField(min_value=1)
+    
+    def validate_file_size_bytes(self, value):
+        if value > settings.MAX_AUDIO_UPLOAD_BYTES:
+            raise serializers.ValidationError("Audio file size cannot exceed 10MB")
+        return value
+
+
+class PronunciationFeedbackSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PronunciationFeedback
+        fields = [
+            'id', 'audio_clip', 'overall_score', 'clarity_score', 'fluency_score',
+            'pronunciation_issues', 'improvement_suggestions', 'phoneme_analysis',
+            'created_at'
+        ]
+        read_only_fields = ['audio_clip']
+
+
+class DatasetSerializer(serializers.ModelSerializer):
+    created_by_info = UserProfileSerializer(source='created_by', read_only=True)
+    
+    class Meta:
+        model = Dataset
+        fields = [
+            'id', 'name', 'description', 'dialect', 'version', 'parent', 'created_by',
+            'created_by_info', 'total_clips', 'total_duration_seconds', 'validated_watermark',
+            'manifest_file', 'shard_index_file', 'metadata', 'is_public', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'created_by', 'total_clips', 'total_duration_seconds', 'validated_watermark', 'shard_index_file'
+        ]
+    
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        dialect = attrs.get('dialect', getattr(self.instance, 'dialect', None))
+        if parent and parent.dialect != dialect:
+            raise serializers.ValidationError({'parent': 'Parent version must have the same dialect'})
+        return attrs
+
+
+class BenchmarkResultSerializer(serializers.ModelSerializer):
+    dataset_info = DatasetSerializer(source='dataset', read_only=True)
+    
+    class Meta:
+        model = BenchmarkResult
+        fields = [
+            'id', 'dataset', 'dataset_info', 'model_name', 'model_version',
+            'wer', 'cer', 'total_clips_tested', 'average_latency_ms',
+            'metadata', 'created_at'
+        ]
+
+
+class AudioClipListSerializer(serializers.ModelSerializer):
+    uploader_username = serializers.CharField(source='uploader.username', read_only=True)
+    uploader_nickname = serializers.CharField(source='uploader.nickname', read_only=True)
+    audio_url = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AudioClip
+        fields = [
+            'id', 'uploader_username', 'uploader_nickname', 'dialect', 'status',
+            'duration_seconds', 'audio_url', 'stream_url', 'annotation_count', 'consensus_reached',
+            'quality_score', 'created_at'
+        ]
+    
+    def get_audio_url(self, obj):
+        if obj.s3_url:
+            return obj.s3_url
+        request = self.context.get('request')
+        if obj.audio_file and request:
+            return request.build_absolute_uri(obj.audio_file.url)
+        return None
+    
+    def get_stream_url(self, obj):
+        return signed_stream_url(obj, self.context.get('request'))
+
+
+class AudioClipPrefetchSerializer(serializers.ModelSerializer):
+    audio_url = serializers.SerializerMethodField()
+    stream_url = serializers.SerializerMethodField()
+    waveform_pyramid = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AudioClip
+        fields = [
+            'id', 'dialect', 'duration_seconds', 'audio_url', 'stream_url',
+            'content_sha256', 'waveform_pyramid'
+        ]
+    
+    def get_audio_url(self, obj):
+        if obj.s3_url:
+            return obj.s3_url
+        request = self.context.get('request')
+        if obj.audio_file and request:
+            return request.build_absolute_uri(obj.audio_file.url)
+        return None
+    
+    def get_stream_url(self, obj):
+        return signed_stream_url(obj, self.context.get('request'))
+    
+    def get_waveform_pyramid(self, obj):
+        return waveform_pyramid(obj.waveform_data or [])
@@ -0,0 +1,250 @@
+import re
+import struct
+import zlib
+import hashlib
+import logging
+from datetime import timezone as dt_timezone
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_BYTES = 64 * 1024
+ZIP32_MAX_BYTES = 0xFFFFFFFF
+ZIP32_MAX_ENTRIES = 0xFFFF
+# Bit 3: CRC and sizes follow each member's data; bit 11: names are UTF-8
+ZIP_FLAGS = 0x0808
+ZIP_LOCAL_HEADER_BYTES = 30
+ZIP_DATA_DESCRIPTOR_BYTES = 16
+ZIP_CENTRAL_HEADER_BYTES = 46
+ZIP_END_RECORD_BYTES = 22
+
+BYTE_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def parse_byte_range(header, size):
+    """Parse a single-range Range header into inclusive (start, end); None means serve the whole body"""
+    match = BYTE_RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    
+    if start >= size or end < start:
+        raise UnsatisfiableRange()
+    
+    return start, end
+
+
+def not_modified_response(request, etag, cache_control=None):
+    """A 304 if the client already holds this exact representation, else None"""
+    if not etag or request.headers.get('If-None-Match') != etag:
+        return None
+    
+    response = HttpResponse(status=304)
+    response['ETag'] = etag
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
+
+
+def iter_file_range(path, start, end):
+    """Yield bytes start..end inclusive of a file, opening it only once the body is consumed"""
+    with open(path, 'rb') as source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = source.read(min(STREAM_CHUNK_BYTES, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def byte_range_response(request, size, iter_range, content_type, etag=None, filename=None, cache_control=None):
+    """Stream a body of known size, honouring Range, If-Range and If-None-Match"""
+    not_modified = not_modified_response(request, etag, cache_control)
+    if not_modified:
+        return not_modified
+    
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+    
+    start, end = byte_range or (0, size - 1)
+    
+    response = StreamingHttpResponse(
+        iter_range(start, end),
+        status=206 if byte_range else 200,
+        content_type=content_type
+    )
+    response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    
+    if byte_range:
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    if etag:
+        response['ETag'] = etag
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    
+    return response
+
+
+def dos_timestamp(value):
+    value = value.astimezone(dt_timezone.utc)
+    date = ((max(value.year, 1980) - 1980) << 9) | (value.month << 5) | value.day
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    return date, time
+
+
+class ZipMember:
+    """One stored (uncompressed) archive entry whose size is known before its bytes are read"""
+    
+    def __init__(self, name, size, modified, open_data, crc_cache_key=None):
+        self.name = name.encode('utf-8')
+        self.size = size
+        self.date, self.time = dos_timestamp(modified)
+        self.open_data = open_data
+        self.crc_cache_key = crc_cache_key
+        self.crc = None
+        self.offset = None
+    
+    @property
+    def span(self):
+        return ZIP_LOCAL_HEADER_BYTES + len(self.name) + self.size + ZIP_DATA_DESCRIPTOR_BYTES
+    
+    def local_header(self):
+        return struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, ZIP_FLAGS, 0, self.time, self.date,
+            0, 0, 0, len(self.name), 0
+        ) + self.name
+    
+    def data_descriptor(self):
+        return struct.pack('<IIII', 0x08074b50, self.ensure_crc(), self.size, self.size)
+    
+    def central_header(self):
+        return struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, 20, 20, ZIP_FLAGS, 0, self.time, self.date,
+            self.ensure_crc(), self.size, self.size, len(self.name), 0, 0, 0, 0, 0, self.offset
+        ) + self.name
+    
+    def iter_data(self):
+        """Yield the member's bytes in bounded chunks, recording their CRC-32"""
+        crc = 0
+        read = 0
+        
+        with self.open_data() as source:
+            for block in iter(lambda: source.read(STREAM_CHUNK_BYTES), b''):
+                read += len(block)
+                if read > self.size:
+                    break
+                crc = zlib.crc32(block, crc)
+                yield block
+        
+        if read != self.size:
+            raise IOError(f"Archive member {self.name.decode('utf-8')} changed size: expected {self.size} bytes")
+        
+        self.crc = crc
+        if self.crc_cache_key:
+            cache.set(self.crc_cache_key, crc, None)
+    
+    def ensure_crc(self):
+        if self.crc is None and self.crc_cache_key:
+            self.crc = cache.get(self.crc_cache_key)
+        if self.crc is None:
+            for _ in self.iter_data():
+                pass
+        return self.crc
+
+
+class StreamingZip:
+    """A deterministic ZIP laid out up front, so any byte range can be produced without writing the archive"""
+    
+    def __init__(self, members):
+        self.members = members
+        
+        offset = 0
+        for member in members:
+            member.offset = offset
+            offset += member.span
+        
+        self.central_offset = offset
+        self.central_size = sum(ZIP_CENTRAL_HEADER_BYTES + len(member.name) for member in members)
+        self.size = self.central_offset + self.central_size + ZIP_END_RECORD_BYTES
+    
+    @property
+    def fits_zip32(self):
+        return self.size <= ZIP32_MAX_BYTES and len(self.members) <= ZIP32_MAX_ENTRIES
+    
+    @property
+    def etag(self):
+        digest = hashlib.sha1()
+        for member in self.members:
+            digest.update(member.name + struct.pack('<QHH', member.size, member.date, member.time))
+            digest.update((member.crc_cache_key or '').encode('utf-8'))
+        return f'"{digest.hexdigest()}"'
+    
+    def end_record(self):
+        return struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, len(self.members), len(self.members),
+            self.central_size, self.central_offset, 0
+        )
+    
+    def iter_central_directory(self):
+        for member in self.members:
+            yield member.central_header()
+    
+    def segments(self):
+        for member in self.members:
+            yield ZIP_LOCAL_HEADER_BYTES + len(member.name), lambda member=member: [member.local_header()]
+            yield member.size, member.iter_data
+            yield ZIP_DATA_DESCRIPTOR_BYTES, lambda member=member: [member.data_descriptor()]
+        
+        yield self.central_size, self.iter_central_directory
+        yield ZIP_END_RECORD_BYTES, lambda: [self.end_record()]
+    
+    def iter_range(self, start, end):
+        """Yield archive bytes start..end inclusive, skipping segments that lie wholly before start"""
+        position = 0
+        
+        for length, produce in self.segments():
+            segment_end = position + length
+            
+            if segment_end > start:
+                offset = position
+                for block in produce():
+                    block_end = offset + len(block)
+                    low = max(start, offset) - offset
+                    high = min(end + 1, block_end) - offset
+                    if high > low:
+                        yield block[low:high]
+                    offset = block_end
+                    if offset > end:
+                        break
+            
+            position = segment_end
+            if position > end:
+                return
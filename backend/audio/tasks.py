@@ -0,0 +1,1083 @@
+from celery import shared_task, chain, chord, group
+from django.conf import settings
+from django.utils import timezone
+import requests
+import logging
+import json
+import os
+import tempfile
+import tarfile
+import time
+import io
+import uuid
+import numpy as np
+from datetime import timedelta
+from botocore.exceptions import ClientError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q, F, Sum, Max
+from .models import AudioClip, PronunciationFeedback, Dataset, DatasetClip, UploadSession
+from .utils import (
+    upload_to_s3, calculate_audio_metrics, get_s3_client,
+    compute_sha256, load_pcm_samples, waveform_from_samples, metrics_from_samples,
+    batch_metrics_from_samples, build_pronunciation_feedback, assess_audio_quality,
+    acoustic_fingerprint, fingerprint_segments, fingerprint_hamming_distance, frame_fingerprint,
+    fingerprint_bit_error_rate, transcode_audio,
+    STORAGE_TIER_FORMATS
+)
+from .cache import get_local_audio_path, get_decoded_audio_path
+from .headers import sniff_audio_header, check_audio_header, AudioHeaderError
+from .exports import export_corpus
+
+logger = logging.getLogger(__name__)
+
+
+INGEST_STAGE_FIELDS = [
+    'id', 'audio_file', 'content_sha256', 'dialect', 'sample_rate', 'duration_seconds',
+    's3_url', 'waveform_data', 'storage_tier', 'acoustic_fingerprint', 'created_at'
+]
+
+
+def build_ingest_pipeline(clip_id):
+    """Decode once, drop duplicate and unusable clips, fan out the analysis stages, then write the clip once"""
+    return chain(
+        decode_clip_audio.s(clip_id, time.time()),
+        check_clip_duplicates.s(),
+        check_clip_quality.s(),
+        chord(
+            group(
+                mirror_clip_to_s3.s(),
+                compute_clip_waveform.s(),
+                compute_clip_metrics.s(),
+                transcribe_clip.s(),
+            ),
+            finalize_clip_ingest.s(clip_id)
+        )
+    )
+
+
+def dispatch_clip_processing(clip_id):
+    return build_ingest_pipeline(clip_id).apply_async()
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def stage_result(context, stage, started, **result):
+    return {
+        'stage': stage,
+        'dispatched_at': context.get('dispatched_at'),
+        'upstream_fields': context.get('fields', {}),
+        'timings': {**context['timings'], stage: elapsed_ms(started)},
+        **result
+    }
+
+
+def retry_or_skip_stage(task, context, stage, exc, countdown=60):
+    clip_id = context['clip_id']
+    logger.error(f"Ingest stage {stage} failed for clip {clip_id}: {str(exc)}")
+    
+    if task.request.retries < task.max_retries:
+        raise task.retry(exc=exc, countdown=countdown)
+    
+    return {
+        'stage': stage,
+        'dispatched_at': context.get('dispatched_at'),
+        'upstream_fields': context.get('fields', {}),
+        'timings': context['timings'],
+        'error': str(exc)
+    }
+
+
+@shared_task
+def process_audio_clip(clip_id):
+    """Kept for messages queued before the ingest pipeline existed"""
+    dispatch_clip_processing(clip_id)
+
+
+@shared_task
+def request_asr_transcription(clip_id):
+    """Kept for messages queued before the ingest pipeline existed; runs only the ASR stage"""
+    # Seed the stage with the recorded timings so finalize merges the asr entry instead of replacing them
+    timings = AudioClip.objects.filter(id=clip_id).values_list('ingest_timings', flat=True).first() or {}
+    chord([transcribe_clip.s({'clip_id': clip_id, 'timings': timings})], finalize_clip_ingest.s(clip_id)).apply_async()
+
+
+@shared_task(bind=True, max_retries=3)
+def decode_clip_audio(self, clip_id, dispatched_at=None):
+    started = time.perf_counter()
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=clip_id)
+        
+        get_decoded_audio_path(audio_clip)
+        
+        return {
+            'clip_id': clip_id,
+            'dispatched_at': dispatched_at,
+            'timings': {'decode': elapsed_ms(started)},
+        }
+    
+    except AudioClip.DoesNotExist:
+        logger.error(f"AudioClip {clip_id} not found")
+        self.request.chain = None
+    except Exception as exc:
+        logger.error(f"Error decoding audio clip {clip_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+def fingerprint_fields(fingerprint):
+    segments = fingerprint_segments(fingerprint) if fingerprint else [None] * 4
+    return {
+        'acoustic_fingerprint': fingerprint,
+        **{f'fingerprint_segment_{index}': segment for index, segment in enumerate(segments)},
+    }
+
+
+def find_duplicate_original(audio_clip, fingerprint, samples, sample_rate):
+    """Return the earliest clip this one duplicates, by exact hash or verified fingerprint"""
+    candidates = AudioClip.objects.filter(
+        duplicate_of__isnull=True,
+        created_at__lt=audio_clip.created_at
+    ).exclude(id=audio_clip.id).order_by('created_at')
+    
+    if audio_clip.content_sha256:
+        original = candidates.filter(content_sha256=audio_clip.content_sha256).only('id').first()
+        if original:
+            return original
+    
+    if fingerprint is None:
+        return None
+    
+    # Banded lookup: a copy within three bits of the original still matches at least one segment exactly.
+    # The whole-fingerprint match covers clips fingerprinted before segments were stored.
+    segment_match = Q(acoustic_fingerprint=fingerprint)
+    for index, segment in enumerate(fingerprint_segments(fingerprint)):
+        segment_match |= Q(**{f'fingerprint_segment_{index}': segment})
+    
+    near_duplicates = candidates.filter(
+        segment_match,
+        duration_seconds__range=(audio_clip.duration_seconds - 0.5, audio_clip.duration_seconds + 0.5)
+    ).values_list('id', 'acoustic_fingerprint', 'created_at')
+    
+    # Rank every band match on the coarse fingerprint before limiting, so colliding older clips
+    # cannot crowd out the real original; only the closest few are loaded and verified frame by frame
+    ranked = sorted(
+        near_duplicates,
+        key=lambda row: (fingerprint_hamming_distance(fingerprint, row[1]), row[2])
+    )[:settings.DEDUP_MAX_VERIFIED_CANDIDATES]
+    shortlist = AudioClip.objects.only(*INGEST_STAGE_FIELDS).in_bulk([row[0] for row in ranked])
+    
+    bits = None
+    for candidate in (shortlist[row[0]] for row in ranked):
+        if bits is None:
+            bits = frame_fingerprint(samples, sample_rate)
+        
+        candidate_samples, candidate_rate = load_pcm_samples(get_decoded_audio_path(candidate))
+        error_rate = fingerprint_bit_error_rate(bits, frame_fingerprint(candidate_samples, candidate_rate))
+        
+        if error_rate <= settings.DEDUP_MAX_BIT_ERROR_RATE:
+            return candidate
+    
+    return None
+
+
+@shared_task(bind=True, max_retries=3)
+def check_clip_duplicates(self, context):
+    """Short-circuit the pipeline for re-uploads of an existing recording"""
+    started = time.perf_counter()
+    clip_id = context['clip_id']
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=clip_id)
+        
+        samples, sample_rate = load_pcm_samples(get_decoded_audio_path(audio_clip))
+        fingerprint = acoustic_fingerprint(samples, sample_rate)
+        original = find_duplicate_original(audio_clip, fingerprint, samples, sample_rate)
+        
+        timings = {**context['timings'], 'dedup': elapsed_ms(started)}
+        passed = {
+            **context,
+            'timings': timings,
+            'fields': {**context.get('fields', {}), **fingerprint_fields(fingerprint)},
+        }
+        
+        if original is None:
+            return passed
+        
+        rejected = AudioClip.objects.filter(id=clip_id, status='pending').update(
+            status='rejected',
+            rejection_reasons=['duplicate'],
+            duplicate_of=original.id,
+            **fingerprint_fields(fingerprint),
+            ingest_timings=timings,
+            updated_at=timezone.now()
+        )
+        
+        # Only the run that actually rejected the clip may stop the rest of its pipeline
+        if not rejected:
+            logger.warning(f"Clip {clip_id} left pending before it could be rejected as a duplicate")
+            return passed
+        
+        self.request.chain = None
+        
+        logger.info(f"Clip {clip_id} is a duplicate of clip {original.id}")
+        return {**context, 'timings': timings, 'duplicate_of': str(original.id)}
+    
+    except AudioClip.DoesNotExist:
+        logger.error(f"AudioClip {clip_id} not found")
+        self.request.chain = None
+    except Exception as exc:
+        logger.error(f"Error checking audio clip {clip_id} for duplicates: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def check_clip_quality(self, context):
+    """Reject unusable clips before ASR, feedback or annotation work is spent on them"""
+    started = time.perf_counter()
+    clip_id = context['clip_id']
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=clip_id)
+        
+        samples, sample_rate = load_pcm_samples(get_decoded_audio_path(audio_clip))
+        quality = assess_audio_quality(samples, sample_rate)
+        
+        timings = {**context['timings'], 'quality_gate': elapsed_ms(started)}
+        
+        if quality['is_valid']:
+            return {**context, 'timings': timings}
+        
+        rejected = AudioClip.objects.filter(id=clip_id, status='pending').update(
+            **context.get('fields', {}),
+            status='rejected',
+            rejection_reasons=quality['issues'],
+            ingest_timings=timings,
+            updated_at=timezone.now()
+        )
+        
+        if not rejected:
+            logger.warning(f"Clip {clip_id} left pending before the quality gate could reject it")
+            return {**context, 'timings': timings}
+        
+        self.request.chain = None
+        
+        logger.info(f"Clip {clip_id} rejected by quality gate: {quality['issues']} {quality['metrics']}")
+        return {**context, 'timings': timings, 'rejected': quality['issues']}
+    
+    except AudioClip.DoesNotExist:
+        logger.error(f"AudioClip {clip_id} not found")
+        self.request.chain = None
+    except Exception as exc:
+        logger.error(f"Error checking quality of audio clip {clip_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def mirror_clip_to_s3(self, context):
+    started = time.perf_counter()
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=context['clip_id'])
+        fields = {}
+        
+        if settings.AWS_STORAGE_BUCKET_NAME and not audio_clip.s3_url:
+            with open(get_local_audio_path(audio_clip), 'rb') as audio_file:
+                s3_url = upload_to_s3(audio_file, f"audio_clips/{audio_clip.id}")
+            if s3_url:
+                fields['s3_url'] = s3_url
+        
+        return stage_result(context, 'mirror', started, fields=fields)
+    
+    except Exception as exc:
+        return retry_or_skip_stage(self, context, 'mirror', exc)
+
+
+@shared_task(bind=True, max_retries=3)
+def compute_clip_waveform(self, context):
+    started = time.perf_counter()
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=context['clip_id'])
+        fields = {}
+        
+        if not audio_clip.waveform_data:
+            samples, _ = load_pcm_samples(get_decoded_audio_path(audio_clip))
+            fields['waveform_data'] = waveform_from_samples(samples)
+        
+        return stage_result(context, 'waveform', started, fields=fields)
+    
+    except Exception as exc:
+        return retry_or_skip_stage(self, context, 'waveform', exc)
+
+
+@shared_task(bind=True, max_retries=2)
+def compute_clip_metrics(self, context):
+    started = time.perf_counter()
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=context['clip_id'])
+        
+        samples, _ = load_pcm_samples(get_decoded_audio_path(audio_clip))
+        
+        return stage_result(context, 'metrics', started, metrics=metrics_from_samples(samples))
+    
+    except Exception as exc:
+        return retry_or_skip_stage(self, context, 'metrics', exc)
+
+
+@shared_task(bind=True, max_retries=3)
+def transcribe_clip(self, context):
+    started = time.perf_counter()
+    
+    try:
+        audio_clip = AudioClip.objects.only(*INGEST_STAGE_FIELDS).get(id=context['clip_id'])
+        
+        asr_url = f"{settings.ASR_SERVICE_URL}/transcribe"
+        
+        data = {
+            'dialect': audio_clip.dialect,
+            'sample_rate': audio_clip.sample_rate
+        }
+        
+        with open(get_local_audio_path(audio_clip), 'rb') as audio_file:
+            files = {'audio': (os.path.basename(audio_clip.audio_file.name), audio_file)}
+            response = requests.post(asr_url, files=files, data=data, timeout=30)
+        
+        if response.status_code != 200:
+            logger.error(f"ASR service returned status {response.status_code} for clip {audio_clip.id}")
+            return stage_result(context, 'asr', started, fields={}, error=f"ASR status {response.status_code}")
+        
+        result = response.json()
+        
+        return stage_result(context, 'asr', started, fields={
+            'asr_draft_transcription': result.get('transcription', ''),
+            'asr_confidence_score': result.get('confidence', 0.0),
+        })
+    
+    except requests.exceptions.RequestException as exc:
+        return retry_or_skip_stage(self, context, 'asr', exc, countdown=120)
+    except Exception as exc:
+        return retry_or_skip_stage(self, context, 'asr', exc)
+
+
+@shared_task
+def finalize_clip_ingest(stage_results, clip_id):
+    """Merge stage outputs into a single clip update and record stage timings"""
+    started = time.perf_counter()
+    
+    fields = {}
+    timings = {}
+    errors = {}
+    metrics = None
+    
+    for result in stage_results:
+        fields.update(result.get('upstream_fields', {}))
+        fields.update(result.get('fields', {}))
+        timings.update(result.get('timings', {}))
+        if result.get('error'):
+            errors[result['stage']] = result['error']
+        if result.get('metrics') is not None:
+            metrics = result['metrics']
+    
+    if metrics is not None:
+        PronunciationFeedback.objects.update_or_create(
+            audio_clip_id=clip_id,
+            defaults=build_pronunciation_feedback(metrics)
+        )
+    
+    timings['finalize'] = elapsed_ms(started)
+    
+    dispatched_at = stage_results[0].get('dispatched_at') if stage_results else None
+    if dispatched_at:
+        timings['total'] = round((time.time() - dispatched_at) * 1000, 2)
+    
+    if errors:
+        timings['errors'] = errors
+    
+    AudioClip.objects.filter(id=clip_id).update(
+        **fields,
+        ingest_timings=timings,
+        updated_at=timezone.now()
+    )
+    
+    logger.info(f"Ingest pipeline finished for clip {clip_id} in {timings.get('total', '?')}ms")
+
+
+@shared_task(bind=True, max_retries=2)
+def generate_pronunciation_feedback(self, clip_id):
+    try:
+        audio_clip = AudioClip.objects.get(id=clip_id)
+        
+        metrics = calculate_audio_metrics(get_local_audio_path(audio_clip))
+        
+        PronunciationFeedback.objects.update_or_create(
+            audio_clip=audio_clip,
+            defaults=build_pronunciation_feedback(metrics)
+        )
+        
+        logger.info(f"Pronunciation feedback generated for clip {clip_id}")
+    
+    except AudioClip.DoesNotExist:
+        logger.error(f"AudioClip {clip_id} not found")
+    except Exception as exc:
+        logger.error(f"Error generating pronunciation feedback for clip {clip_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=2)
+def generate_pronunciation_feedback_batch(self, clip_ids):
+    """Score many clips in one vectorized pass and upsert their feedback rows together"""
+    try:
+        audio_clips = []
+        sample_arrays = []
+        
+        for audio_clip in AudioClip.objects.filter(id__in=clip_ids).only(*INGEST_STAGE_FIELDS):
+            try:
+                samples, _ = load_pcm_samples(get_decoded_audio_path(audio_clip))
+            except Exception as e:
+                logger.error(f"Skipping pronunciation feedback for clip {audio_clip.id}: {str(e)}")
+                continue
+            
+            if len(samples):
+                audio_clips.append(audio_clip)
+                sample_arrays.append(samples.astype(np.float32))
+        
+        if not audio_clips:
+            return 0
+        
+        feedback = [
+            PronunciationFeedback(audio_clip=audio_clip, **build_pronunciation_feedback(metrics))
+            for audio_clip, metrics in zip(audio_clips, batch_metrics_from_samples(sample_arrays))
+        ]
+        
+        PronunciationFeedback.objects.bulk_create(
+            feedback,
+            update_conflicts=True,
+            unique_fields=['audio_clip'],
+            update_fields=[
+                'overall_score', 'clarity_score', 'fluency_score', 'pronunciation_issues',
+                'improvement_suggestions', 'phoneme_analysis'
+            ]
+        )
+        
+        logger.info(f"Pronunciation feedback generated for {len(feedback)} of {len(clip_ids)} clips")
+        return len(feedback)
+    
+    except Exception as exc:
+        logger.error(f"Error generating batched pronunciation feedback: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+MANIFEST_FIELDS = [
+    'id', 'audio_file', 's3_url', 'final_transcription', 'duration_seconds', 'quality_score', 'dialect'
+]
+
+
+def manifest_entry(clip):
+    return {
+        'id': str(clip.id),
+        'audio_url': clip.s3_url or clip.audio_file.url,
+        'transcription': clip.final_transcription,
+        'duration': clip.duration_seconds,
+        'quality_score': clip.quality_score,
+        'dialect': clip.dialect
+    }
+
+
+def write_manifest_line(manifest, entry):
+    manifest.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+def backfill_validated_at(dialect):
+    """Stamp clips validated before validated_at existed, so full and delta manifests window them alike"""
+    return AudioClip.objects.filter(
+        dialect=dialect,
+        status='validated',
+        consensus_reached=True,
+        validated_at__isnull=True
+    ).update(validated_at=F('updated_at'))
+
+
+def write_full_manifest(dataset, watermark, manifest):
+    """Rebuild every DatasetClip row and manifest line for a base version"""
+    chunk_size = settings.DATASET_EXPORT_CHUNK_SIZE
+    
+    validated_clips = AudioClip.objects.filter(
+        dialect=dataset.dialect,
+        status='validated',
+        consensus_reached=True,
+        validated_at__lte=watermark
+    ).only(*MANIFEST_FIELDS).order_by('created_at')
+    
+    DatasetClip.objects.filter(dataset=dataset).delete()
+    
+    total_clips = 0
+    total_duration = 0.0
+    dataset_clips = []
+    
+    for clip in validated_clips.iterator(chunk_size=chunk_size):
+        write_manifest_line(manifest, manifest_entry(clip))
+        dataset_clips.append(DatasetClip(dataset=dataset, audio_clip_id=clip.id, order=total_clips))
+        
+        total_clips += 1
+        total_duration += clip.duration_seconds
+        
+        if len(dataset_clips) >= chunk_size:
+            DatasetClip.objects.bulk_create(dataset_clips)
+            dataset_clips = []
+    
+    DatasetClip.objects.bulk_create(dataset_clips)
+    
+    return total_clips, total_duration
+
+
+def chain_membership(chain_ids, clip_ids):
+    """Clips currently in a version chain, judged by each clip's latest added/removed row"""
+    position = {dataset_id: index for index, dataset_id in enumerate(chain_ids)}
+    
+    rows = DatasetClip.objects.filter(
+        dataset_id__in=chain_ids,
+        audio_clip_id__in=clip_ids
+    ).values_list('dataset_id', 'audio_clip_id', 'change')
+    
+    latest = {}
+    for dataset_id, clip_id, change in sorted(rows, key=lambda row: position[row[0]]):
+        latest[clip_id] = change
+    
+    return {clip_id for clip_id, change in latest.items() if change == 'added'}
+
+
+def write_delta_manifest(dataset, watermark, manifest):
+    """Record only the clips validated or invalidated since the parent version's watermark"""
+    parent = dataset.parent
+    chain_ids = [version.id for version in parent.version_chain()]
+    since = parent.validated_watermark
+    
+    added_clips = list(AudioClip.objects.filter(
+        dialect=dataset.dialect,
+        status='validated',
+        consensus_reached=True,
+        validated_at__gt=since,
+        validated_at__lte=watermark
+    ).only(*MANIFEST_FIELDS).order_by('validated_at'))
+    
+    invalidated_ids = list(AudioClip.objects.filter(
+        dialect=dataset.dialect,
+        updated_at__gt=since
+    ).exclude(status='validated', consensus_reached=True).values_list('id', flat=True))
+    
+    present = chain_membership(chain_ids, [clip.id for clip in added_clips] + invalidated_ids)
+    added_clips = [clip for clip in added_clips if clip.id not in present]
+    removed_ids = [clip_id for clip_id in invalidated_ids if clip_id in present]
+    
+    last_order = DatasetClip.objects.filter(dataset_id__in=chain_ids).aggregate(last=Max('order'))['last']
+    order = 0 if last_order is None else last_order + 1
+    
+    DatasetClip.objects.filter(dataset=dataset).delete()
+    
+    dataset_clips = []
+    for clip in added_clips:
+        write_manifest_line(manifest, {'op': 'add', **manifest_entry(clip)})
+        dataset_clips.append(DatasetClip(dataset=dataset, audio_clip_id=clip.id, order=order, change='added'))
+        order += 1
+    
+    for clip_id in removed_ids:
+        write_manifest_line(manifest, {'op': 'remove', 'id': str(clip_id)})
+        dataset_clips.append(DatasetClip(dataset=dataset, audio_clip_id=clip_id, order=order, change='removed'))
+        order += 1
+    
+    DatasetClip.objects.bulk_create(dataset_clips, batch_size=settings.DATASET_EXPORT_CHUNK_SIZE)
+    
+    removed_duration = AudioClip.objects.filter(id__in=removed_ids).aggregate(
+        total=Sum('duration_seconds')
+    )['total'] or 0.0
+    
+    total_clips = parent.total_clips + len(added_clips) - len(removed_ids)
+    total_duration = (
+        parent.total_duration_seconds + sum(clip.duration_seconds for clip in added_clips) - removed_duration
+    )
+    
+    logger.info(f"Dataset {dataset.id} delta: {len(added_clips)} added, {len(removed_ids)} removed")
+    return total_clips, total_duration
+
+
+@shared_task
+def generate_dataset_manifest(dataset_id):
+    """Stream a version's clips into a JSONL manifest: the full set for a base version, the changes for a child"""
+    try:
+        dataset = Dataset.objects.select_related('parent').get(id=dataset_id)
+        
+        if dataset.parent and not dataset.parent.validated_watermark:
+            logger.error(f"Parent of dataset {dataset_id} has no manifest yet")
+            return
+        
+        # Children store deltas against this version's rows and watermark; rebuilding would corrupt them
+        if dataset.children.exists():
+            logger.error(f"Dataset {dataset_id} has published versions; refusing to regenerate its manifest")
+            return
+        
+        incremental = dataset.parent is not None
+        watermark = timezone.now()
+        
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as manifest:
+            with transaction.atomic():
+                backfill_validated_at(dataset.dialect)
+                
+                if incremental:
+                    total_clips, total_duration = write_delta_manifest(dataset, watermark, manifest)
+                else:
+                    total_clips, total_duration = write_full_manifest(dataset, watermark, manifest)
+                
+                dataset.total_clips = total_clips
+                dataset.total_duration_seconds = total_duration
+                dataset.validated_watermark = watermark
+                dataset.save(update_fields=['total_clips', 'total_duration_seconds', 'validated_watermark', 'updated_at'])
+            
+            manifest.seek(0)
+            
+            kind = 'delta' if incremental else 'manifest'
+            manifest_filename = f"{dataset.name.replace(' ', '_')}_v{dataset.version}_{kind}.jsonl"
+            dataset.manifest_file.save(manifest_filename, File(manifest), save=True)
+        
+        logger.info(f"Dataset manifest generated for dataset {dataset_id}: {total_clips} clips")
+    
+    except Dataset.DoesNotExist:
+        logger.error(f"Dataset {dataset_id} not found")
+    except Exception as exc:
+        logger.error(f"Error generating dataset manifest for {dataset_id}: {str(exc)}")
+
+
+SHARD_AUDIO_EXTENSIONS = {
+    'wav': '.wav',
+    'flac': STORAGE_TIER_FORMATS['flac']['extension'],
+    'opus': STORAGE_TIER_FORMATS['opus']['extension'],
+}
+
+
+def build_dataset_packaging(dataset_id):
+    """One pack task per fixed-size shard, fanned out across workers, then a shard index"""
+    clip_ids = [str(clip_id) for clip_id in Dataset.objects.get(id=dataset_id).materialized_clip_ids()]
+    shard_size = settings.DATASET_SHARD_CLIPS
+    
+    return chord(
+        group(
+            pack_dataset_shard.s(dataset_id, shard_number, clip_ids[start:start + shard_size])
+            for shard_number, start in enumerate(range(0, len(clip_ids), shard_size))
+        ),
+        write_dataset_shard_index.s(dataset_id)
+    )
+
+
+def shard_sample_audio(clip, audio_format):
+    decoded_path = get_decoded_audio_path(clip)
+    
+    if audio_format == 'wav':
+        with open(decoded_path, 'rb') as f:
+            return f.read()
+    
+    buffer = io.BytesIO()
+    transcode_audio(decoded_path, buffer, audio_format)
+    return buffer.getvalue()
+
+
+def add_tar_member(tar, name, data, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    tar.addfile(info, io.BytesIO(data))
+
+
+@shared_task(bind=True, max_retries=2)
+def pack_dataset_shard(self, dataset_id, shard_number, clip_ids):
+    """Write one WebDataset-style tar shard of audio and transcript pairs"""
+    try:
+        dataset = Dataset.objects.get(id=dataset_id)
+        audio_format = settings.DATASET_SHARD_AUDIO_FORMAT
+        extension = SHARD_AUDIO_EXTENSIONS[audio_format]
+        
+        clips = AudioClip.objects.filter(id__in=clip_ids).only(
+            *MANIFEST_FIELDS, 'content_sha256', 'storage_tier', 'sample_rate', 'created_at'
+        ).in_bulk()
+        
+        packed = 0
+        total_duration = 0.0
+        
+        with tempfile.NamedTemporaryFile(suffix='.tar') as shard_file:
+            with tarfile.open(fileobj=shard_file, mode='w') as tar:
+                for clip_id in clip_ids:
+                    clip = clips.get(uuid.UUID(clip_id))
+                    if clip is None:
+                        continue
+                    
+                    try:
+                        audio_data = shard_sample_audio(clip, audio_format)
+                    except Exception as e:
+                        logger.error(f"Skipping clip {clip_id} in shard {shard_number}: {str(e)}")
+                        continue
+                    
+                    sample = manifest_entry(clip)
+                    del sample['audio_url']
+                    mtime = int(clip.created_at.timestamp())
+                    
+                    add_tar_member(tar, f"{clip_id}{extension}", audio_data, mtime)
+                    add_tar_member(tar, f"{clip_id}.json", json.dumps(sample, ensure_ascii=False).encode('utf-8'), mtime)
+                    
+                    packed += 1
+                    total_duration += clip.duration_seconds
+            
+            size_bytes = shard_file.tell()
+            sha256 = compute_sha256(shard_file)
+            
+            shard_name = f"{dataset.name.replace(' ', '_')}_v{dataset.version}-{shard_number:06d}.tar"
+            stored_name = default_storage.save(f"datasets/shards/{dataset.id}/{shard_name}", File(shard_file))
+        
+        logger.info(f"Packed shard {shard_number} of dataset {dataset_id} with {packed} clips")
+        
+        return {
+            'shard': shard_number,
+            'path': stored_name,
+            'clips': packed,
+            'duration_seconds': round(total_duration, 3),
+            'size_bytes': size_bytes,
+            'sha256': sha256,
+        }
+    
+    except Dataset.DoesNotExist:
+        logger.error(f"Dataset {dataset_id} not found")
+    except Exception as exc:
+        logger.error(f"Error packing shard {shard_number} of dataset {dataset_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task
+def write_dataset_shard_index(shard_results, dataset_id):
+    try:
+        dataset = Dataset.objects.get(id=dataset_id)
+        
+        shards = sorted((result for result in shard_results if result), key=lambda result: result['shard'])
+        
+        shard_index = {
+            'dataset_name': dataset.name,
+            'version': dataset.version,
+            'dialect': dataset.dialect,
+            'audio_format': settings.DATASET_SHARD_AUDIO_FORMAT,
+            'total_clips': sum(shard['clips'] for shard in shards),
+            'total_shards': len(shards),
+            'shards': shards,
+        }
+        
+        index_filename = f"{dataset.name.replace(' ', '_')}_v{dataset.version}_shards.json"
+        dataset.shard_index_file.save(
+            index_filename,
+            ContentFile(json.dumps(shard_index, indent=2).encode('utf-8')),
+            save=True
+        )
+        
+        logger.info(f"Shard index written for dataset {dataset_id}: {len(shards)} shards")
+    
+    except Dataset.DoesNotExist:
+        logger.error(f"Dataset {dataset_id} not found")
+
+
+@shared_task
+def export_corpus_parquet():
+    """Snapshot the validated corpus's clip and annotation metadata as Parquet partitioned by dialect and month"""
+    prefix = f"exports/parquet/{timezone.now():%Y%m%dT%H%M%S}"
+    files = export_corpus(prefix)
+    
+    default_storage.save(
+        f"{prefix}/_manifest.json",
+        ContentFile(json.dumps({'created_at': timezone.now().isoformat(), 'tables': files}, indent=2).encode('utf-8'))
+    )
+    
+    logger.info(f"Corpus Parquet export written to {prefix}")
+
+
+def chunk_storage_path(session, offset):
+    return f"uploads/partial/{session.id}/{offset:012d}.part"
+
+
+def discard_upload_data(session):
+    try:
+        if session.upload_method == 'resumable':
+            for offset in session.chunk_digests or {}:
+                default_storage.delete(chunk_storage_path(session, int(offset)))
+        else:
+            get_s3_client().delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=session.storage_key)
+    except Exception as e:
+        logger.error(f"Failed to discard data for upload session {session.id}: {str(e)}")
+
+
+def fail_upload_session(session, errors, discard=True):
+    session.status = 'failed'
+    session.error_message = '; '.join(errors)
+    session.save(update_fields=['status', 'error_message', 'updated_at'])
+    
+    if discard:
+        discard_upload_data(session)
+    
+    logger.warning(f"Upload session {session.id} rejected: {session.error_message}")
+
+
+def create_clip_from_upload(session, local_path, file_size_bytes, audio_file):
+    """Check an uploaded file's header, validate its metadata and create the AudioClip"""
+    from .serializers import AudioClipMetadataSerializer
+    
+    extension = os.path.splitext(session.storage_key)[1].lstrip('.').lower()
+    
+    try:
+        with open(local_path, 'rb') as local_file:
+            header = sniff_audio_header(local_file, size=file_size_bytes)
+    except AudioHeaderError as e:
+        fail_upload_session(session, [str(e)])
+        return None
+    
+    errors = check_audio_header(header, extension)
+    if errors:
+        fail_upload_session(session, errors)
+        return None
+    
+    serializer = AudioClipMetadataSerializer(data={
+        **session.clip_metadata,
+        'duration_seconds': round(header['duration_seconds'], 3),
+        'sample_rate': header['sample_rate'],
+        'channels': header['channels'],
+        'file_size_bytes': file_size_bytes,
+    })
+    
+    if not serializer.is_valid():
+        fail_upload_session(session, [
+            f"{field}: {' '.join(str(message) for message in messages)}"
+            for field, messages in serializer.errors.items()
+        ])
+        return None
+    
+    with open(local_path, 'rb') as local_file:
+        content_sha256 = compute_sha256(local_file)
+    
+    audio_clip = serializer.save(
+        uploader=session.uploader,
+        audio_file=audio_file,
+        content_sha256=content_sha256,
+        stored_file_size_bytes=file_size_bytes
+    )
+    
+    session.audio_clip = audio_clip
+    session.status = 'completed'
+    session.save(update_fields=['audio_clip', 'status', 'updated_at'])
+    
+    session.uploader.update_streak()
+    
+    dispatch_clip_processing(str(audio_clip.id))
+    
+    return audio_clip
+
+
+@shared_task(bind=True, max_retries=3)
+def finalize_direct_upload(self, upload_id):
+    """Verify an object uploaded straight to storage and create its AudioClip"""
+    try:
+        session = UploadSession.objects.select_related('uploader').get(id=upload_id)
+        
+        if session.status not in ['uploaded', 'processing']:
+            logger.info(f"Upload session {upload_id} already finalized ({session.status})")
+            return
+        
+        session.status = 'processing'
+        session.save(update_fields=['status', 'updated_at'])
+        
+        s3_client = get_s3_client()
+        
+        try:
+            head = s3_client.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=session.storage_key)
+        except ClientError:
+            fail_upload_session(session, ['Uploaded object not found in storage'], discard=False)
+            return
+        
+        errors = []
+        file_size_bytes = head['ContentLength']
+        
+        if file_size_bytes > settings.MAX_AUDIO_UPLOAD_BYTES:
+            errors.append('Audio file size cannot exceed 10MB')
+        
+        if head.get('ContentType') != session.content_type:
+            errors.append(f"Unexpected content type {head.get('ContentType')}")
+        
+        if errors:
+            fail_upload_session(session, errors)
+            return
+        
+        extension = os.path.splitext(session.storage_key)[1]
+        with tempfile.NamedTemporaryFile(suffix=extension) as temp_file:
+            s3_client.download_fileobj(settings.AWS_STORAGE_BUCKET_NAME, session.storage_key, temp_file)
+            temp_file.flush()
+            
+            audio_clip = create_clip_from_upload(session, temp_file.name, file_size_bytes, session.storage_key)
+        
+        if audio_clip:
+            logger.info(f"Direct upload {upload_id} finalized as audio clip {audio_clip.id}")
+    
+    except UploadSession.DoesNotExist:
+        logger.error(f"UploadSession {upload_id} not found")
+    except Exception as exc:
+        logger.error(f"Error finalizing direct upload {upload_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def assemble_resumable_upload(self, upload_id):
+    """Concatenate the stored chunks of a resumable upload into one AudioClip"""
+    try:
+        session = UploadSession.objects.select_related('uploader').get(id=upload_id)
+        
+        if session.status not in ['uploaded', 'processing']:
+            logger.info(f"Upload session {upload_id} already finalized ({session.status})")
+            return
+        
+        session.status = 'processing'
+        session.save(update_fields=['status', 'updated_at'])
+        
+        offsets = sorted(int(offset) for offset in session.chunk_digests or {})
+        extension = os.path.splitext(session.storage_key)[1]
+        
+        with tempfile.NamedTemporaryFile(suffix=extension) as temp_file:
+            for offset in offsets:
+                if temp_file.tell() != offset:
+                    fail_upload_session(session, [f"Missing upload data before offset {offset}"])
+                    return
+                
+                with default_storage.open(chunk_storage_path(session, offset), 'rb') as chunk:
+                    for block in iter(lambda: chunk.read(64 * 1024), b''):
+                        temp_file.write(block)
+            
+            temp_file.flush()
+            
+            if temp_file.tell() != session.file_size_bytes:
+                fail_upload_session(session, [
+                    f"Assembled {temp_file.tell()} bytes, expected {session.file_size_bytes}"
+                ])
+                return
+            
+            temp_file.seek(0)
+            audio_clip = create_clip_from_upload(
+                session,
+                temp_file.name,
+                session.file_size_bytes,
+                File(temp_file, name=os.path.basename(session.storage_key))
+            )
+        
+        if audio_clip:
+            discard_upload_data(session)
+            logger.info(f"Resumable upload {upload_id} assembled as audio clip {audio_clip.id}")
+    
+    except UploadSession.DoesNotExist:
+        logger.error(f"UploadSession {upload_id} not found")
+    except Exception as exc:
+        logger.error(f"Error assembling resumable upload {upload_id}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task
+def expire_upload_sessions():
+    """Discard partial uploads whose session expired before completion"""
+    expired_sessions = UploadSession.objects.filter(
+        status='created',
+        expires_at__lt=timezone.now()
+    )
+    
+    expired_ids = []
+    for session in expired_sessions.iterator():
+        discard_upload_data(session)
+        expired_ids.append(session.id)
+    
+    if expired_ids:
+        UploadSession.objects.filter(id__in=expired_ids, status='created').update(
+            status='expired',
+            updated_at=timezone.now()
+        )
+    
+    logger.info(f"Expired {len(expired_ids)} upload sessions")
+
+
+@shared_task
+def tier_archived_audio():
+    """Queue transcodes for settled clips still stored in their upload format"""
+    cutoff = timezone.now() - timedelta(days=settings.STORAGE_TIER_AFTER_DAYS)
+    
+    queued = 0
+    for status, tier in settings.STORAGE_TIER_CODECS.items():
+        clip_ids = AudioClip.objects.filter(
+            status=status,
+            storage_tier='original',
+            tiered_at__isnull=True,
+            updated_at__lt=cutoff
+        ).order_by('updated_at').values_list('id', flat=True)[:settings.STORAGE_TIER_BATCH_SIZE]
+        
+        for clip_id in clip_ids:
+            transcode_clip_storage.delay(str(clip_id), tier)
+            queued += 1
+    
+    logger.info(f"Queued {queued} clips for storage tiering")
+
+
+@shared_task(bind=True, max_retries=3)
+def transcode_clip_storage(self, clip_id, tier):
+    try:
+        audio_clip = AudioClip.objects.get(id=clip_id)
+        
+        if audio_clip.storage_tier != 'original':
+            return
+        
+        tier_format = STORAGE_TIER_FORMATS[tier]
+        source_path = get_local_audio_path(audio_clip)
+        original_name = audio_clip.audio_file.name
+        
+        with tempfile.NamedTemporaryFile(suffix=tier_format['extension'], delete=False) as temp_file:
+            temp_path = temp_file.name
+        
+        try:
+            transcode_audio(source_path, temp_path, tier)
+            stored_file_size_bytes = os.path.getsize(temp_path)
+            
+            if stored_file_size_bytes >= audio_clip.file_size_bytes:
+                logger.info(f"Keeping original format for clip {clip_id}: {tier} is not smaller")
+                AudioClip.objects.filter(id=clip_id).update(tiered_at=timezone.now())
+                return
+            
+            archive_name = f"audio_archive/{tier}/{audio_clip.id}{tier_format['extension']}"
+            with open(temp_path, 'rb') as f:
+                stored_name = default_storage.save(archive_name, File(f))
+            
+            if audio_clip.s3_url:
+                with open(temp_path, 'rb') as f:
+                    upload_to_s3(f, f"audio_clips/{audio_clip.id}", content_type=tier_format['content_type'])
+        finally:
+            os.unlink(temp_path)
+        
+        updated = AudioClip.objects.filter(id=clip_id, storage_tier='original').update(
+            audio_file=stored_name,
+            storage_tier=tier,
+            stored_file_size_bytes=stored_file_size_bytes,
+            tiered_at=timezone.now()
+        )
+        
+        if updated:
+            default_storage.delete(original_name)
+        else:
+            default_storage.delete(stored_name)
+        
+        logger.info(
+            f"Clip {clip_id} moved to {tier} tier: "
+            f"{audio_clip.file_size_bytes} -> {stored_file_size_bytes} bytes"
+        )
+    
+    except AudioClip.DoesNotExist:
+        logger.error(f"AudioClip {clip_id} not found")
+    except Exception as exc:
+        logger.error(f"Error transcoding clip {clip_id} to {tier}: {str(exc)}")
+        raise self.retry(exc=exc, countdown=300)
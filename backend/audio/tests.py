@@ -0,0 +1,193 @@
+from unittest import mock
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.models import User
+from .authentication import StreamTokenAuthentication
+from .models import AudioClip
+from .serializers import AudioClipListSerializer
+from .tasks import find_duplicate_original, fingerprint_fields
+from .utils import acoustic_fingerprint, frame_fingerprint, fingerprint_bit_error_rate, fingerprint_segments
+
+SAMPLE_RATE = 16000
+
+
+def speech_like(seed, seconds=3.0):
+    """Voiced syllables with random pitch and formants, loud enough to fingerprint like a recording"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    signal = np.zeros_like(t)
+    
+    syllables = int(seconds * 4)
+    for k in range(syllables):
+        envelope = np.exp(-0.5 * ((t - (k + 0.5) / syllables * seconds) / rng.uniform(0.08, 0.15)) ** 2)
+        pitch = rng.uniform(100, 220)
+        formants = rng.uniform(300, 2500, 3)
+        for harmonic in range(1, 15):
+            frequency = pitch * harmonic
+            weight = np.exp(-((frequency - formants) / 150) ** 2).sum()
+            signal += envelope * weight * np.sin(2 * np.pi * frequency * t + rng.uniform(0, 6))
+    
+    signal += 0.01 * rng.standard_normal(len(t))
+    return (signal / np.abs(signal).max() * 12000).astype(np.int16)
+
+
+def perturb(samples, gain=1.0, noise=0.0, shift_ms=0, seed=0):
+    """Re-recorded copy: gain change, additive noise in LSBs and a leading delay"""
+    rng = np.random.default_rng(seed)
+    copy = samples.astype(np.float64) * gain + noise * rng.standard_normal(len(samples))
+    shift = int(SAMPLE_RATE * shift_ms / 1000)
+    copy = np.concatenate([np.zeros(shift), copy])[:len(samples)]
+    return np.clip(copy, -32768, 32767).astype(np.int16)
+
+
+class FingerprintThresholdTests(SimpleTestCase):
+    """DEDUP_MAX_BIT_ERROR_RATE must sit between perturbed copies and unrelated recordings"""
+    
+    def test_perturbed_copies_fall_under_threshold(self):
+        for seed in range(5):
+            original = frame_fingerprint(speech_like(seed), SAMPLE_RATE)
+            for copy in (
+                perturb(speech_like(seed), gain=0.5, noise=20, shift_ms=2, seed=seed),
+                perturb(speech_like(seed), shift_ms=10),
+            ):
+                error_rate = fingerprint_bit_error_rate(original, frame_fingerprint(copy, SAMPLE_RATE))
+                self.assertLess(error_rate, settings.DEDUP_MAX_BIT_ERROR_RATE)
+    
+    def test_unrelated_recordings_stay_clear_of_threshold(self):
+        for seed in range(5):
+            error_rate = fingerprint_bit_error_rate(
+                frame_fingerprint(speech_like(seed), SAMPLE_RATE),
+                frame_fingerprint(speech_like(100 + seed), SAMPLE_RATE)
+            )
+            # Independent fingerprints disagree on about half their bits; keep a wide margin below that
+            self.assertGreater(error_rate, settings.DEDUP_MAX_BIT_ERROR_RATE + 0.05)
+
+
+class FindDuplicateOriginalTests(TestCase):
+    def setUp(self):
+        self.uploader = User.objects.create_user(username='uploader', email='uploader@example.com', password='pass')
+        self.samples = {}
+    
+    def create_clip(self, samples):
+        fingerprint = acoustic_fingerprint(samples, SAMPLE_RATE)
+        clip = AudioClip.objects.create(
+            uploader=self.uploader,
+            audio_file='audio_clips/clip.wav',
+            dialect='sheng',
+            duration_seconds=len(samples) / SAMPLE_RATE,
+            sample_rate=SAMPLE_RATE,
+            file_size_bytes=len(samples) * 2,
+            consent_given=True,
+            consent_timestamp=timezone.now(),
+            **fingerprint_fields(fingerprint)
+        )
+        self.samples[clip.pk] = samples
+        return clip, fingerprint
+    
+    def find(self, clip, fingerprint):
+        with mock.patch('audio.tasks.get_decoded_audio_path', side_effect=lambda candidate: candidate.pk), \
+                mock.patch('audio.tasks.load_pcm_samples', side_effect=lambda pk: (self.samples[pk], SAMPLE_RATE)):
+            return find_duplicate_original(clip, fingerprint, self.samples[clip.pk], SAMPLE_RATE)
+    
+    def test_perturbed_copy_is_found_without_an_exact_fingerprint_match(self):
+        original, original_fingerprint = self.create_clip(speech_like(7))
+        copy, copy_fingerprint = self.create_clip(perturb(speech_like(7), gain=0.5, noise=20, shift_ms=2, seed=7))
+        
+        # The copy would have been missed by an exact lookup on the coarse fingerprint
+        self.assertNotEqual(copy_fingerprint, original_fingerprint)
+        self.assertTrue(any(
+            a == b for a, b in zip(fingerprint_segments(copy_fingerprint), fingerprint_segments(original_fingerprint))
+        ))
+        
+        self.assertEqual(self.find(copy, copy_fingerprint), original)
+    
+    def test_unrelated_clip_is_not_a_duplicate(self):
+        self.create_clip(speech_like(7))
+        other, other_fingerprint = self.create_clip(speech_like(8))
+        
+        self.assertIsNone(self.find(other, other_fingerprint))
+    
+    def test_original_is_found_behind_many_older_band_collisions(self):
+        samples = speech_like(7)
+        copy_samples = perturb(speech_like(7), gain=0.5, noise=20, shift_ms=2, seed=7)
+        original_segments = fingerprint_segments(acoustic_fingerprint(samples, SAMPLE_RATE))
+        copy_segments = fingerprint_segments(acoustic_fingerprint(copy_samples, SAMPLE_RATE))
+        shared = next(index for index, pair in enumerate(zip(copy_segments, original_segments)) if pair[0] == pair[1])
+        
+        # Older clips that share the copy's matching band but are far away on every other bit
+        width = len(copy_segments[0])
+        collider = ''.join(
+            segment if index == shared else format(int(segment, 16) ^ (16 ** width - 1), f'0{width}x')
+            for index, segment in enumerate(copy_segments)
+        )
+        colliders = AudioClip.objects.bulk_create([
+            AudioClip(
+                uploader=self.uploader,
+                audio_file=f'audio_clips/collider{i}.wav',
+                dialect='sheng',
+                duration_seconds=len(samples) / SAMPLE_RATE,
+                sample_rate=SAMPLE_RATE,
+                file_size_bytes=len(samples) * 2,
+                consent_given=True,
+                consent_timestamp=timezone.now(),
+                **fingerprint_fields(collider)
+            )
+            for i in range(60)
+        ])
+        unrelated = speech_like(8)
+        self.samples.update({collider.pk: unrelated for collider in colliders})
+        
+        original, _ = self.create_clip(samples)
+        copy, copy_fingerprint = self.create_clip(copy_samples)
+        
+        self.assertEqual(self.find(copy, copy_fingerprint), original)
+
+
+class StreamTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='listener', email='listener@example.com', password='pass')
+        self.clip = AudioClip.objects.create(
+            uploader=self.user,
+            audio_file='audio_clips/clip.wav',
+            dialect='sheng',
+            duration_seconds=3.0,
+            sample_rate=SAMPLE_RATE,
+            file_size_bytes=96000,
+            consent_given=True,
+            consent_timestamp=timezone.now()
+        )
+        self.window_start = 1000 * settings.AUDIO_STREAM_TOKEN_MAX_AGE
+    
+    def stream_url(self, now):
+        request = APIRequestFactory().get('/api/audio/clips/')
+        request.user = self.user
+        with mock.patch('audio.authentication.time.time', return_value=now):
+            return AudioClipListSerializer(self.clip, context={'request': request}).data['stream_url']
+    
+    def authenticate(self, url, now):
+        request = Request(APIRequestFactory().get(url))
+        with mock.patch('audio.authentication.time.time', return_value=now):
+            return StreamTokenAuthentication().authenticate(request)
+    
+    def test_stream_url_is_stable_within_a_window(self):
+        max_age = settings.AUDIO_STREAM_TOKEN_MAX_AGE
+        first = self.stream_url(self.window_start + 1)
+        
+        self.assertEqual(first, self.stream_url(self.window_start + max_age - 1))
+        self.assertNotEqual(first, self.stream_url(self.window_start + max_age))
+    
+    def test_token_expires_one_window_after_its_own(self):
+        max_age = settings.AUDIO_STREAM_TOKEN_MAX_AGE
+        url = self.stream_url(self.window_start + max_age - 1)
+        
+        user, payload = self.authenticate(url, self.window_start + 2 * max_age)
+        self.assertEqual(user, self.user)
+        self.assertEqual(payload['clip'], str(self.clip.id))
+        
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(url, self.window_start + 2 * max_age + 1)
@@ -0,0 +1,17 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'clips', views.AudioClipViewSet, basename='audio-clip')
+router.register(r'uploads', views.UploadSessionViewSet, basename='upload-session')
+router.register(r'datasets', views.DatasetViewSet, basename='dataset')
+router.register(r'benchmarks', views.BenchmarkResultViewSet, basename='benchmark')
+
+urlpatterns = [
+    path('', include(router.urls)),
+    path('dashboard/', views.dashboard_stats, name='dashboard_stats'),
+    path('quality-gate/stats/', views.quality_gate_stats, name='quality_gate_stats'),
+    path('storage-tiers/stats/', views.storage_tier_stats, name='storage_tier_stats'),
+    path('exports/parquet/', views.corpus_parquet_export, name='corpus_parquet_export'),
+]
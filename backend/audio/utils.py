@@ -0,0 +1,497 @@
+import boto3
+from django.conf import settings
+import numpy as np
+import wave
+import logging
+from pydub import AudioSegment
+import io
+import hashlib
+
+logger = logging.getLogger(__name__)
+
+
+def get_s3_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME
+    )
+
+
+def upload_to_s3(file_obj, key, content_type='audio/wav'):
+    if not settings.AWS_STORAGE_BUCKET_NAME:
+        return None
+    
+    try:
+        s3_client = get_s3_client()
+        
+        file_obj.seek(0)
+        
+        s3_client.upload_fileobj(
+            file_obj,
+            settings.AWS_STORAGE_BUCKET_NAME,
+            key,
+            ExtraArgs={'ContentType': content_type}
+        )
+        
+        url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+        
+        logger.info(f"File uploaded to S3: {key}")
+        return url
+    
+    except Exception as e:
+        logger.error(f"Failed to upload to S3: {str(e)}")
+        return None
+
+
+def compute_sha256(file_obj):
+    sha256 = hashlib.sha256()
+    
+    file_obj.seek(0)
+    for block in iter(lambda: file_obj.read(1024 * 1024), b''):
+        sha256.update(block)
+    file_obj.seek(0)
+    
+    return sha256.hexdigest()
+
+
+def generate_presigned_upload(key, content_type, max_size_bytes, expires_in):
+    if not settings.AWS_STORAGE_BUCKET_NAME:
+        return None
+    
+    try:
+        s3_client = get_s3_client()
+        
+        return s3_client.generate_presigned_post(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_size_bytes],
+            ],
+            ExpiresIn=expires_in
+        )
+    
+    except Exception as e:
+        logger.error(f"Failed to generate presigned upload for {key}: {str(e)}")
+        return None
+
+
+def load_pcm_samples(wav_path):
+    with wave.open(wav_path, 'rb') as wav_file:
+        sample_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+    
+    return np.frombuffer(frames, dtype=np.int16).astype(float), sample_rate
+
+
+def decode_audio_samples(audio_path):
+    audio = AudioSegment.from_file(audio_path)
+    
+    samples = np.array(audio.get_array_of_samples())
+    
+    if audio.channels == 2:
+        samples = samples.reshape((-1, 2))
+        samples = samples.mean(axis=1)
+    
+    return samples.astype(float)
+
+
+def waveform_from_samples(samples, num_samples=100):
+    peak = np.max(np.abs(samples)) if len(samples) else 0
+    if peak == 0:
+        return []
+    
+    samples = samples / peak
+    
+    chunk_size = len(samples) // num_samples
+    if chunk_size == 0:
+        chunk_size = 1
+    
+    waveform = []
+    for i in range(0, len(samples), chunk_size):
+        chunk = samples[i:i+chunk_size]
+        if len(chunk) > 0:
+            waveform.append(float(np.max(np.abs(chunk))))
+    
+    return waveform[:num_samples]
+
+
+def waveform_pyramid(waveform, min_points=12):
+    """Successively halved peak envelopes of a waveform, finest first, for zoom levels without a refetch"""
+    levels = [waveform] if waveform else []
+    
+    while levels and len(levels[-1]) > min_points:
+        finer = levels[-1]
+        levels.append([max(finer[i:i+2]) for i in range(0, len(finer), 2)])
+    
+    return levels
+
+
+def generate_waveform_data(audio_path, num_samples=100):
+    try:
+        return waveform_from_samples(decode_audio_samples(audio_path), num_samples)
+    
+    except Exception as e:
+        logger.error(f"Failed to generate waveform data: {str(e)}")
+        return []
+
+
+FEEDBACK_FRAME_LENGTH = 512
+
+
+def metrics_from_samples(samples):
+    signal_power = np.mean(samples ** 2)
+    noise_power = np.var(samples)
+    
+    if noise_power > 0:
+        snr = 10 * np.log10(signal_power / noise_power)
+    else:
+        snr = 30.0
+    
+    rms = np.sqrt(np.mean(samples ** 2))
+    clarity = min(1.0, rms / 5000.0)
+    
+    zero_crossings = np.sum(np.diff(np.sign(samples)) != 0)
+    zcr = zero_crossings / len(samples)
+    fluency = 1.0 - min(1.0, zcr * 10)
+    
+    return {
+        'snr': float(snr),
+        'clarity': float(clarity),
+        'fluency': float(fluency),
+        'rms': float(rms),
+        'zero_crossing_rate': float(zcr),
+        'phoneme_data': {}
+    }
+
+
+def batch_metrics_from_samples(sample_arrays, frame_length=FEEDBACK_FRAME_LENGTH):
+    """metrics_from_samples for many clips at once, over one zero-padded float32 frame array"""
+    lengths = np.array([len(samples) for samples in sample_arrays])
+    frame_count = max(1, -(-int(lengths.max()) // frame_length))
+    
+    batch = np.zeros((len(sample_arrays), frame_count * frame_length), dtype=np.float32)
+    for row, samples in enumerate(sample_arrays):
+        batch[row, :len(samples)] = samples
+    
+    frames = batch.reshape(len(sample_arrays), frame_count, frame_length)
+    frame_energy = np.einsum('bfn,bfn->bf', frames, frames).astype(np.float64)
+    frame_sum = frames.sum(axis=2).astype(np.float64)
+    
+    signs = np.sign(frames)
+    frame_crossings = np.count_nonzero(signs[:, :, 1:] != signs[:, :, :-1], axis=2)
+    boundary_crossings = np.count_nonzero(signs[:, 1:, 0] != signs[:, :-1, -1], axis=1)
+    # Padding after a clip's last sample adds at most one spurious crossing
+    padding_crossings = (lengths < batch.shape[1]) & (batch[np.arange(len(lengths)), np.maximum(lengths - 1, 0)] != 0)
+    zero_crossings = frame_crossings.sum(axis=1) + boundary_crossings - padding_crossings
+    
+    lengths = np.maximum(lengths, 1)
+    signal_power = frame_energy.sum(axis=1) / lengths
+    noise_power = signal_power - (frame_sum.sum(axis=1) / lengths) ** 2
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        snr = np.where(noise_power > 0, 10 * np.log10(signal_power / noise_power), 30.0)
+    
+    rms = np.sqrt(signal_power)
+    clarity = np.minimum(1.0, rms / 5000.0)
+    zcr = zero_crossings / lengths
+    fluency = 1.0 - np.minimum(1.0, zcr * 10)
+    
+    return [
+        {
+            'snr': float(snr[row]),
+            'clarity': float(clarity[row]),
+            'fluency': float(fluency[row]),
+            'rms': float(rms[row]),
+            'zero_crossing_rate': float(zcr[row]),
+            'phoneme_data': {}
+        }
+        for row in range(len(sample_arrays))
+    ]
+
+
+def calculate_audio_metrics(audio_path):
+    try:
+        return metrics_from_samples(decode_audio_samples(audio_path))
+    
+    except Exception as e:
+        logger.error(f"Failed to calculate audio metrics: {str(e)}")
+        return {
+            'snr': 20.0,
+            'clarity': 0.7,
+            'fluency': 0.8,
+            'phoneme_data': {}
+        }
+
+
+def build_pronunciation_feedback(metrics):
+    overall_score = min(100, max(0, 
+        (metrics.get('snr', 20) / 30 * 40) +
+        (metrics.get('clarity', 0.7) * 30) +
+        (metrics.get('fluency', 0.8) * 30)
+    ))
+    
+    clarity_score = metrics.get('clarity', 0.7) * 100
+    fluency_score = metrics.get('fluency', 0.8) * 100
+    
+    pronunciation_issues = []
+    if clarity_score < 60:
+        pronunciation_issues.append({
+            'type': 'clarity',
+            'description': 'Audio clarity could be improved',
+            'severity': 'medium'
+        })
+    
+    if fluency_score < 60:
+        pronunciation_issues.append({
+            'type': 'fluency',
+            'description': 'Speech fluency could be improved',
+            'severity': 'medium'
+        })
+    
+    improvement_suggestions = []
+    if clarity_score < 70:
+        improvement_suggestions.append('Try recording in a quieter environment')
+        improvement_suggestions.append('Speak closer to the microphone')
+    
+    if fluency_score < 70:
+        improvement_suggestions.append('Practice speaking at a steady pace')
+        improvement_suggestions.append('Take a breath between phrases')
+    
+    return {
+        'overall_score': overall_score,
+        'clarity_score': clarity_score,
+        'fluency_score': fluency_score,
+        'pronunciation_issues': pronunciation_issues,
+        'improvement_suggestions': improvement_suggestions,
+        'phoneme_analysis': metrics.get('phoneme_data', {})
+    }
+
+
+def convert_audio_to_wav(input_path, output_path, sample_rate=16000, channels=1):
+    try:
+        audio = AudioSegment.from_file(input_path)
+        
+        audio = audio.set_frame_rate(sample_rate)
+        audio = audio.set_channels(channels)
+        audio = audio.set_sample_width(2)
+        
+        audio.export(output_path, format='wav')
+        
+        logger.info(f"Audio converted to WAV: {output_path}")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Failed to convert audio to WAV: {str(e)}")
+        return False
+
+
+def chunk_audio(audio_path, chunk_duration_seconds=8):
+    try:
+        audio = AudioSegment.from_file(audio_path)
+        
+        chunk_length_ms = chunk_duration_seconds * 1000
+        
+        chunks = []
+        for i in range(0, len(audio), chunk_length_ms):
+            chunk = audio[i:i+chunk_length_ms]
+            chunks.append(chunk)
+        
+        return chunks
+    
+    except Exception as e:
+        logger.error(f"Failed to chunk audio: {str(e)}")
+        return []
+
+
+QUALITY_FRAME_SECONDS = 0.025
+CLIPPING_LEVEL = 32767 * 0.99
+
+QUALITY_ISSUE_MESSAGES = {
+    'too_short': 'Audio is too short (minimum 1 second)',
+    'too_long': 'Audio is too long (maximum 20 seconds)',
+    'too_quiet': 'Audio volume is too low',
+    'low_snr': 'Audio has too much background noise',
+    'clipped': 'Audio is distorted by clipping',
+}
+
+
+def frame_energies(samples, sample_rate, frame_seconds=QUALITY_FRAME_SECONDS):
+    frame_length = max(1, int(sample_rate * frame_seconds))
+    frame_count = len(samples) // frame_length
+    
+    if frame_count == 0:
+        return np.array([np.mean(samples ** 2) if len(samples) else 0.0])
+    
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    return np.mean(frames ** 2, axis=1)
+
+
+def assess_audio_quality(samples, sample_rate):
+    duration_seconds = len(samples) / sample_rate if sample_rate else 0.0
+    energies = frame_energies(samples, sample_rate)
+    
+    rms = float(np.sqrt(np.mean(samples ** 2))) if len(samples) else 0.0
+    clipping_ratio = float(np.mean(np.abs(samples) >= CLIPPING_LEVEL)) if len(samples) else 0.0
+    
+    noise_floor = np.percentile(energies, 10)
+    speech_level = np.percentile(energies, 90)
+    
+    if noise_floor > 0:
+        snr_db = float(10 * np.log10(speech_level / noise_floor))
+    else:
+        snr_db = 60.0 if speech_level > 0 else 0.0
+    
+    issues = []
+    
+    if duration_seconds < settings.QUALITY_GATE_MIN_DURATION_SECONDS:
+        issues.append('too_short')
+    
+    if duration_seconds > settings.MAX_CLIP_DURATION_SECONDS:
+        issues.append('too_long')
+    
+    if rms < settings.QUALITY_GATE_MIN_RMS:
+        issues.append('too_quiet')
+    
+    if snr_db < settings.QUALITY_GATE_MIN_SNR_DB:
+        issues.append('low_snr')
+    
+    if clipping_ratio > settings.QUALITY_GATE_MAX_CLIPPING_RATIO:
+        issues.append('clipped')
+    
+    return {
+        'is_valid': len(issues) == 0,
+        'issues': issues,
+        'metrics': {
+            'duration_seconds': round(duration_seconds, 3),
+            'rms': round(rms, 2),
+            'snr_db': round(snr_db, 2),
+            'clipping_ratio': round(clipping_ratio, 5),
+        }
+    }
+
+
+FINGERPRINT_FRAME_SECONDS = 0.064
+FINGERPRINT_BANDS = 33
+FINGERPRINT_MIN_HZ = 300
+FINGERPRINT_MAX_HZ = 2000
+FINGERPRINT_SEGMENTS = 4
+FINGERPRINT_MAX_OFFSET_FRAMES = 8
+
+
+def band_energies(samples, sample_rate):
+    """Energy in log-spaced 300-2000Hz bands for half-overlapping frames"""
+    frame_length = int(sample_rate * FINGERPRINT_FRAME_SECONDS)
+    hop = frame_length // 2
+    
+    if frame_length == 0 or len(samples) < frame_length + hop:
+        return None
+    
+    frame_count = 1 + (len(samples) - frame_length) // hop
+    indices = np.arange(frame_length)[None, :] + hop * np.arange(frame_count)[:, None]
+    frames = samples[indices].astype(np.float32) * np.hanning(frame_length).astype(np.float32)
+    
+    spectrum = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+    frequencies = np.fft.rfftfreq(frame_length, 1.0 / sample_rate)
+    
+    edges = np.geomspace(FINGERPRINT_MIN_HZ, min(FINGERPRINT_MAX_HZ, sample_rate / 2), FINGERPRINT_BANDS + 1)
+    band_index = np.digitize(frequencies, edges) - 1
+    in_range = (band_index >= 0) & (band_index < FINGERPRINT_BANDS)
+    
+    band_matrix = np.zeros((in_range.sum(), FINGERPRINT_BANDS), dtype=np.float32)
+    band_matrix[np.arange(in_range.sum()), band_index[in_range]] = 1.0
+    
+    return spectrum[:, in_range] @ band_matrix
+
+
+def acoustic_fingerprint(samples, sample_rate):
+    """64-bit hex summary of spectral shape over four time segments, for indexed lookup"""
+    energies = band_energies(samples, sample_rate)
+    if energies is None or len(energies) < FINGERPRINT_SEGMENTS:
+        return None
+    
+    slopes = energies[:, 0:32:2] > energies[:, 2:34:2]
+    votes = np.stack([segment.mean(axis=0) > 0.5 for segment in np.array_split(slopes, FINGERPRINT_SEGMENTS)])
+    
+    return np.packbits(votes.ravel()).tobytes().hex()
+
+
+def fingerprint_segments(fingerprint):
+    """Split a coarse fingerprint into its four 16-bit segment votes, each indexed on its own for candidate lookup"""
+    width = len(fingerprint) // FINGERPRINT_SEGMENTS
+    return [fingerprint[i * width:(i + 1) * width] for i in range(FINGERPRINT_SEGMENTS)]
+
+
+def fingerprint_hamming_distance(first, second):
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+
+def frame_fingerprint(samples, sample_rate):
+    """Per-frame 32-bit band-energy difference fingerprint (Haitsma-Kalker style)"""
+    energies = band_energies(samples, sample_rate)
+    if energies is None or len(energies) < 2:
+        return None
+    
+    band_differences = energies[:, :-1] - energies[:, 1:]
+    return (band_differences[1:] - band_differences[:-1]) > 0
+
+
+def fingerprint_bit_error_rate(first, second, max_offset=FINGERPRINT_MAX_OFFSET_FRAMES):
+    if first is None or second is None:
+        return 1.0
+    
+    best = 1.0
+    for offset in range(-max_offset, max_offset + 1):
+        a = first[max(0, offset):]
+        b = second[max(0, -offset):]
+        length = min(len(a), len(b))
+        if length == 0:
+            continue
+        best = min(best, float(np.mean(a[:length] != b[:length])))
+    
+    return best
+
+
+STORAGE_TIER_FORMATS = {
+    'flac': {'extension': '.flac', 'content_type': 'audio/flac'},
+    'opus': {'extension': '.ogg', 'content_type': 'audio/ogg'},
+}
+
+
+def transcode_audio(source_path, target_file, tier):
+    """Re-encode a clip for an archive storage tier (lossless FLAC or compact Opus)"""
+    audio = AudioSegment.from_file(source_path)
+    
+    if tier == 'opus':
+        audio.export(target_file, format='ogg', codec='libopus', bitrate=settings.STORAGE_TIER_OPUS_BITRATE)
+    elif tier == 'flac':
+        audio.export(target_file, format='flac')
+    else:
+        raise ValueError(f"Unknown storage tier: {tier}")
+
+
+def validate_audio_quality(audio_path):
+    try:
+        audio = AudioSegment.from_file(audio_path).set_channels(1)
+        samples = np.array(audio.get_array_of_samples()).astype(float)
+        
+        result = assess_audio_quality(samples, audio.frame_rate)
+        
+        return {
+            'is_valid': result['is_valid'],
+            'issues': [QUALITY_ISSUE_MESSAGES[issue] for issue in result['issues']],
+            'reasons': result['issues'],
+            'metrics': result['metrics']
+        }
+    
+    except Exception as e:
+        logger.error(f"Failed to validate audio quality: {str(e)}")
+        return {
+            'is_valid': False,
+            'issues': ['Failed to analyze audio file'],
+            'reasons': [],
+            'metrics': {}
+        }
@@ -0,0 +1,744 @@
+from rest_framework import viewsets, mixins, status, filters
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.settings import api_settings
+from rest_framework.reverse import reverse
+from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.utils import timezone
+from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Q, Sum, Avg, Count
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.cache import cache
+from django.http import HttpResponse
+from datetime import timedelta
+from .models import AudioClip, PronunciationFeedback, Dataset, BenchmarkResult, UploadSession
+from .serializers import (
+    AudioClipSerializer, AudioClipUploadSerializer, AudioClipListSerializer,
+    AudioClipMetadataSerializer, PronunciationFeedbackSerializer, DatasetSerializer,
+    BenchmarkResultSerializer, UploadSessionSerializer, UploadSessionCreateSerializer
+)
+from .tasks import (
+    dispatch_clip_processing, finalize_direct_upload, assemble_resumable_upload,
+    chunk_storage_path, manifest_entry, MANIFEST_FIELDS
+)
+from .parsers import UploadChunkParser
+from .authentication import StreamTokenAuthentication
+from .streaming import (
+    StreamingZip, ZipMember, byte_range_response, iter_file_range, not_modified_response
+)
+from .cache import get_local_audio_path
+from .utils import generate_waveform_data, upload_to_s3, generate_presigned_upload, compute_sha256
+import io
+import os
+import json
+import mimetypes
+import uuid
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def audio_clip_etag(audio_clip):
+    return f'"{audio_clip.content_sha256}-{audio_clip.storage_tier}"'
+
+
+class AudioClipViewSet(viewsets.ModelViewSet):
+    queryset = AudioClip.objects.all()
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['dialect', 'status', 'uploader']
+    search_fields = ['asr_draft_transcription', 'final_transcription']
+    ordering_fields = ['created_at', 'duration_seconds', 'quality_score']
+    ordering = ['-created_at']
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return AudioClipUploadSerializer
+        elif self.action == 'list':
+            return AudioClipListSerializer
+        return AudioClipSerializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        if self.action == 'my_clips':
+            return queryset.filter(uploader=self.request.user)
+        
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(
+                Q(uploader=self.request.user) | Q(status__in=['in_annotation', 'validated'])
+            )
+        
+        return queryset
+    
+    def perform_create(self, serializer):
+        audio_clip = serializer.save(
+            uploader=self.request.user,
+            content_sha256=compute_sha256(serializer.validated_data['audio_file'])
+        )
+        
+        self.request.user.update_streak()
+        
+        dispatch_clip_processing(str(audio_clip.id))
+        
+        logger.info(f"Audio clip {audio_clip.id} created by user {self.request.user.username}")
+    
+    def destroy(self, request, *args, **kwargs):
+        audio_clip = self.get_object()
+        
+        if not audio_clip.can_be_deleted_by(request.user):
+            return Response(
+                {'error': 'You can only delete your own pending or rejected clips'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return super().destroy(request, *args, **kwargs)
+    
+    @action(detail=False, methods=['get'])
+    def my_clips(self, request):
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def feedback(self, request, pk=None):
+        audio_clip = self.get_object()
+        
+        try:
+            feedback = PronunciationFeedback.objects.get(audio_clip=audio_clip)
+            serializer = PronunciationFeedbackSerializer(feedback)
+            return Response(serializer.data)
+        except PronunciationFeedback.DoesNotExist:
+            return Response(
+                {'message': 'Feedback not yet available'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    @action(detail=True, methods=['post'])
+    def submit_for_annotation(self, request, pk=None):
+        audio_clip = self.get_object()
+        
+        if audio_clip.uploader != request.user:
+            return Response(
+                {'error': 'You can only submit your own clips'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if audio_clip.move_to_annotation_queue():
+            return Response({
+                'message': 'Clip submitted for annotation',
+                'clip': AudioClipSerializer(audio_clip, context={'request': request}).data
+            })
+        else:
+            return Response(
+                {'error': 'Clip cannot be submitted. Ensure consent is given and status is pending.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    @action(
+        detail=True,
+        methods=['get'],
+        authentication_classes=api_settings.DEFAULT_AUTHENTICATION_CLASSES + [StreamTokenAuthentication]
+    )
+    def stream(self, request, pk=None):
+        # A signed token only opens the clip it was issued for
+        if isinstance(request.auth, dict) and request.auth.get('clip') != str(pk):
+            return Response({'error': 'Stream token does not match this clip'}, status=status.HTTP_403_FORBIDDEN)
+        
+        audio_clip = self.get_object()
+        cache_control = f"private, max-age={settings.AUDIO_STREAM_MAX_AGE}, immutable"
+        
+        # Stored bytes never change in place, so a known hash answers revalidation without fetching
+        if audio_clip.content_sha256:
+            not_modified = not_modified_response(request, audio_clip_etag(audio_clip), cache_control)
+            if not_modified:
+                return not_modified
+        
+        path = get_local_audio_path(audio_clip)
+        etag = audio_clip_etag(audio_clip)
+        extension = os.path.splitext(audio_clip.audio_file.name)[1].lstrip('.').lower()
+        content_type = settings.AUDIO_CONTENT_TYPES.get(extension) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        
+        if settings.AUDIO_SENDFILE_HEADER:
+            response = HttpResponse(content_type=content_type)
+            if settings.AUDIO_SENDFILE_HEADER == 'X-Accel-Redirect':
+                response['X-Accel-Redirect'] = (
+                    settings.AUDIO_ACCEL_REDIRECT_PREFIX + os.path.relpath(path, settings.AUDIO_CACHE_DIR)
+                )
+            else:
+                response[settings.AUDIO_SENDFILE_HEADER] = path
+            response['ETag'] = etag
+            response['Cache-Control'] = cache_control
+            response['Accept-Ranges'] = 'bytes'
+            return response
+        
+        return byte_range_response(
+            request,
+            os.path.getsize(path),
+            lambda start, end: iter_file_range(path, start, end),
+            content_type=content_type,
+            etag=etag,
+            cache_control=cache_control
+        )
+
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES + [UploadChunkParser]
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(uploader=self.request.user)
+    
+    def upload_headers(self, session):
+        return {
+            'Upload-Offset': str(session.upload_offset),
+            'Upload-Length': str(session.file_size_bytes),
+            'Upload-Expires': session.expires_at.isoformat(),
+            'Cache-Control': 'no-store',
+        }
+    
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return Response(self.get_serializer(session).data, headers=self.upload_headers(session))
+    
+    def partial_update(self, request, pk=None):
+        if request.content_type != UploadChunkParser.media_type:
+            return Response(
+                {'error': f'Chunks must be sent as {UploadChunkParser.media_type}'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'A numeric Upload-Offset header is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        chunk = request.data
+        digest = hashlib.sha256(chunk).hexdigest()
+        
+        with transaction.atomic():
+            session = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            chunk_digests = session.chunk_digests or {}
+            
+            if offset < session.upload_offset:
+                if chunk_digests.get(str(offset)) == [len(chunk), digest]:
+                    return Response(status=status.HTTP_204_NO_CONTENT, headers=self.upload_headers(session))
+                return Response(
+                    {'error': 'Chunk does not match previously received data at this offset'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=self.upload_headers(session)
+                )
+            
+            if session.upload_method != 'resumable' or session.status != 'created':
+                return Response(
+                    {'error': f'Upload is not accepting chunks ({session.status})'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if session.is_expired:
+                return Response({'error': 'Upload session has expired'}, status=status.HTTP_410_GONE)
+            
+            if offset != session.upload_offset:
+                return Response(
+                    {'error': 'Upload-Offset does not match the current upload offset'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=self.upload_headers(session)
+                )
+            
+            if not chunk or offset + len(chunk) > session.file_size_bytes:
+                return Response(
+                    {'error': 'Chunk is empty or exceeds the declared upload length'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            path = chunk_storage_path(session, offset)
+            default_storage.delete(path)
+            default_storage.save(path, ContentFile(chunk))
+            
+            chunk_digests[str(offset)] = [len(chunk), digest]
+            session.chunk_digests = chunk_digests
+            session.upload_offset = offset + len(chunk)
+            
+            if session.upload_offset == session.file_size_bytes:
+                session.status = 'uploaded'
+                transaction.on_commit(lambda: assemble_resumable_upload.delay(str(session.id)))
+            
+            session.save(update_fields=['chunk_digests', 'upload_offset', 'status', 'updated_at'])
+        
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self.upload_headers(session))
+    
+    @action(detail=False, methods=['post'])
+    def resumable(self, request):
+        upload_serializer = UploadSessionCreateSerializer(data=request.data)
+        metadata_serializer = AudioClipMetadataSerializer(data=request.data)
+        
+        upload_valid = upload_serializer.is_valid()
+        if not metadata_serializer.is_valid() or not upload_valid:
+            return Response(
+                {**metadata_serializer.errors, **upload_serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        content_type = upload_serializer.validated_data['content_type']
+        extension = next(
+            ext for ext, mime in settings.AUDIO_CONTENT_TYPES.items() if mime == content_type
+        )
+        upload_id = uuid.uuid4()
+        
+        session = UploadSession.objects.create(
+            id=upload_id,
+            uploader=request.user,
+            upload_method='resumable',
+            storage_key=f"uploads/resumable/{upload_id}.{extension}",
+            content_type=content_type,
+            file_size_bytes=upload_serializer.validated_data['file_size_bytes'],
+            chunk_digests={},
+            clip_metadata=metadata_serializer.data,
+            expires_at=timezone.now() + timedelta(seconds=settings.RESUMABLE_UPLOAD_EXPIRY_SECONDS)
+        )
+        
+        headers = self.upload_headers(session)
+        headers['Location'] = reverse('upload-session-detail', args=[session.id], request=request)
+        
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED, headers=headers)
+    
+    @action(detail=False, methods=['post'])
+    def presign(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        content_type = serializer.validated_data['content_type']
+        extension = next(
+            ext for ext, mime in settings.AUDIO_CONTENT_TYPES.items() if mime == content_type
+        )
+        upload_id = uuid.uuid4()
+        storage_key = f"audio_clips/{timezone.now():%Y/%m/%d}/{upload_id}.{extension}"
+        
+        presigned_post = generate_presigned_upload(
+            storage_key,
+            content_type,
+            settings.MAX_AUDIO_UPLOAD_BYTES,
+            settings.DIRECT_UPLOAD_EXPIRY_SECONDS
+        )
+        
+        if presigned_post is None:
+            return Response(
+                {'error': 'Direct uploads require object storage to be configured'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        session = UploadSession.objects.create(
+            id=upload_id,
+            uploader=request.user,
+            storage_key=storage_key,
+            content_type=content_type,
+            file_size_bytes=serializer.validated_data['file_size_bytes'],
+            expires_at=timezone.now() + timedelta(seconds=settings.DIRECT_UPLOAD_EXPIRY_SECONDS)
+        )
+        
+        return Response({
+            'upload': self.get_serializer(session).data,
+            'presigned_post': presigned_post
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        session = self.get_object()
+        
+        if session.status != 'created':
+            return Response(
+                {'error': f'Upload has already been confirmed ({session.status})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if session.is_expired:
+            session.status = 'expired'
+            session.save(update_fields=['status', 'updated_at'])
+            return Response(
+                {'error': 'Upload session has expired'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = AudioClipMetadataSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        session.clip_metadata = serializer.data
+        session.status = 'uploaded'
+        session.save(update_fields=['clip_metadata', 'status', 'updated_at'])
+        
+        finalize_direct_upload.delay(str(session.id))
+        
+        return Response(self.get_serializer(session).data, status=status.HTTP_202_ACCEPTED)
+
+
+def dataset_archive_name(dataset):
+    return f"{dataset.name.replace(' ', '_')}_v{dataset.version}"
+
+
+def stored_audio_sizes(clips):
+    """Byte sizes of legacy clips' stored audio as the storage backend reports them, cached by file name"""
+    keys = {clip.id: f"zip-size:{clip.audio_file.name}" for clip in clips}
+    sizes = cache.get_many(list(keys.values()))
+    
+    measured = {}
+    for clip in clips:
+        if keys[clip.id] in sizes:
+            continue
+        try:
+            # file_size_bytes was client-supplied for legacy clips, so the archive layout cannot trust it
+            measured[keys[clip.id]] = clip.audio_file.storage.size(clip.audio_file.name)
+        except Exception as e:
+            logger.error(f"Leaving clip {clip.id} out of the archive, its audio is unreadable: {str(e)}")
+    
+    if measured:
+        cache.set_many(measured, None)
+    
+    sizes.update(measured)
+    return {clip_id: sizes[key] for clip_id, key in keys.items() if key in sizes}
+
+
+def dataset_zip_members(dataset):
+    """Audio and transcript entries for every clip in a dataset version, in manifest order"""
+    prefix = dataset_archive_name(dataset)
+    clip_ids = dataset.materialized_clip_ids()
+    chunk_size = settings.DATASET_EXPORT_CHUNK_SIZE
+    
+    members = []
+    for start in range(0, len(clip_ids), chunk_size):
+        chunk = clip_ids[start:start + chunk_size]
+        clips = AudioClip.objects.filter(id__in=chunk).only(
+            *MANIFEST_FIELDS, 'created_at', 'stored_file_size_bytes'
+        ).in_bulk()
+        
+        # Sizes verified at ingest or tiering; only clips that predate them ask storage
+        audio_sizes = {
+            clip.id: clip.stored_file_size_bytes
+            for clip in clips.values() if clip.stored_file_size_bytes is not None
+        }
+        audio_sizes.update(stored_audio_sizes([clip for clip in clips.values() if clip.id not in audio_sizes]))
+        
+        for clip_id in chunk:
+            clip = clips.get(clip_id)
+            if clip is None or clip.id not in audio_sizes:
+                continue
+            
+            audio_name = f"{clip.id}{os.path.splitext(clip.audio_file.name)[1].lower()}"
+            
+            entry = manifest_entry(clip)
+            entry['audio_url'] = audio_name
+            transcript = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+            
+            members.append(ZipMember(
+                f"{prefix}/{audio_name}",
+                audio_sizes[clip.id],
+                clip.created_at,
+                lambda clip=clip: clip.audio_file.storage.open(clip.audio_file.name, 'rb'),
+                crc_cache_key=f"zip-crc:{clip.audio_file.name}"
+            ))
+            members.append(ZipMember(
+                f"{prefix}/{clip.id}.json",
+                len(transcript),
+                clip.created_at,
+                lambda transcript=transcript: io.BytesIO(transcript)
+            ))
+    
+    return members
+
+
+class DatasetViewSet(viewsets.ModelViewSet):
+    queryset = Dataset.objects.all()
+    serializer_class = DatasetSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['dialect', 'is_public']
+    search_fields = ['name', 'description']
+    ordering_fields = ['created_at', 'total_clips']
+    ordering = ['-created_at']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(Q(is_public=True) | Q(created_by=self.request.user))
+        
+        return queryset
+    
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        dataset = self.get_object()
+        
+        if not dataset.is_public and dataset.created_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to download this dataset'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if dataset.manifest_file:
+            return Response({
+                'download_url': request.build_absolute_uri(dataset.manifest_file.url),
+                'manifest_chain': [
+                    request.build_absolute_uri(version.manifest_file.url)
+                    for version in dataset.version_chain() if version.manifest_file
+                ],
+                'shard_index_url': (
+                    request.build_absolute_uri(dataset.shard_index_file.url)
+                    if dataset.shard_index_file else None
+                ),
+                'dataset': DatasetSerializer(dataset).data
+            })
+        else:
+            return Response(
+                {'error': 'Dataset manifest not yet generated'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
+    @action(detail=True, methods=['get'])
+    def download_zip(self, request, pk=None):
+        dataset = self.get_object()
+        
+        if not dataset.is_public and dataset.created_by != request.user and not request.user.is_staff:
+            return Response(
+                {'error': 'You do not have permission to download this dataset'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if not dataset.manifest_file:
+            return Response(
+                {'error': 'Dataset manifest not yet generated'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        archive = StreamingZip(dataset_zip_members(dataset))
+        
+        if not archive.fits_zip32:
+            return Response(
+                {'error': 'Dataset is too large for a single ZIP download; use the packaged shards instead'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        return byte_range_response(
+            request,
+            archive.size,
+            archive.iter_range,
+            content_type='application/zip',
+            etag=archive.etag,
+            filename=f"{dataset_archive_name(dataset)}.zip"
+        )
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def generate_manifest(self, request, pk=None):
+        dataset = self.get_object()
+        
+        if dataset.children.exists():
+            return Response(
+                {'error': 'This dataset has published versions; publish a new version instead of regenerating'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        from .tasks import generate_dataset_manifest
+        generate_dataset_manifest.delay(dataset.id)
+        
+        return Response({
+            'message': 'Dataset manifest generation started',
+            'dataset_id': dataset.id
+        })
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def publish_version(self, request, pk=None):
+        parent = self.get_object()
+        
+        if not parent.validated_watermark:
+            return Response(
+                {'error': 'Generate the dataset manifest before publishing a new version'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        version = request.data.get('version')
+        if not version:
+            return Response({'error': 'version is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        dataset = Dataset.objects.create(
+            name=parent.name,
+            description=request.data.get('description', parent.description),
+            dialect=parent.dialect,
+            version=version,
+            parent=parent,
+            created_by=request.user,
+            metadata=parent.metadata,
+            is_public=parent.is_public
+        )
+        
+        from .tasks import generate_dataset_manifest
+        transaction.on_commit(lambda: generate_dataset_manifest.delay(dataset.id))
+        
+        return Response(DatasetSerializer(dataset).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def package(self, request, pk=None):
+        dataset = self.get_object()
+        
+        if not dataset.manifest_file:
+            return Response(
+                {'error': 'Generate the dataset manifest before packaging shards'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        from .tasks import build_dataset_packaging
+        build_dataset_packaging(dataset.id).apply_async()
+        
+        return Response({
+            'message': 'Dataset shard packaging started',
+            'dataset_id': dataset.id
+        })
+
+
+class BenchmarkResultViewSet(viewsets.ModelViewSet):
+    queryset = BenchmarkResult.objects.all()
+    serializer_class = BenchmarkResultSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['dataset', 'model_name']
+    ordering_fields = ['wer', 'cer', 'created_at']
+    ordering = ['wer']
+    
+    def get_permissions(self):
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            return [IsAdminUser()]
+        return [IsAuthenticated()]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_stats(request):
+    user = request.user
+    
+    total_clips = AudioClip.objects.filter(uploader=user).count()
+    pending_clips = AudioClip.objects.filter(uploader=user, status='pending').count()
+    in_annotation_clips = AudioClip.objects.filter(uploader=user, status='in_annotation').count()
+    validated_clips = AudioClip.objects.filter(uploader=user, status='validated').count()
+    
+    recent_clips = AudioClip.objects.filter(uploader=user).order_by('-created_at')[:5]
+    
+    stats = {
+        'total_clips': total_clips,
+        'pending_clips': pending_clips,
+        'in_annotation_clips': in_annotation_clips,
+        'validated_clips': validated_clips,
+        'recent_clips': AudioClipListSerializer(recent_clips, many=True, context={'request': request}).data,
+        'user_stats': {
+            'streak_days': user.streak_days,
+            'points': user.points,
+            'level': user.level,
+            'total_earnings': str(user.total_earnings_usdc),
+        }
+    }
+    
+    return Response(stats)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def quality_gate_stats(request):
+    from annotations.models import Annotation
+    
+    rejected = AudioClip.objects.filter(status='rejected', rejection_reasons__isnull=False)
+    # Dedup rejections happen before the gate runs, so they are reported apart from its savings
+    duplicate_clips = rejected.filter(duplicate_of__isnull=False)
+    rejected_clips = rejected.filter(duplicate_of__isnull=True)
+    
+    rejected_count = rejected_clips.count()
+    rejected_audio_seconds = rejected_clips.aggregate(total=Sum('duration_seconds'))['total'] or 0.0
+    
+    by_reason = {}
+    for reasons in rejected_clips.values_list('rejection_reasons', flat=True).iterator():
+        for reason in reasons:
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+    
+    skipped_stages = ['mirror', 'waveform', 'metrics', 'asr', 'finalize']
+    stage_samples = AudioClip.objects.filter(
+        rejection_reasons__isnull=True,
+        ingest_timings__isnull=False
+    ).order_by('-created_at').values_list('ingest_timings', flat=True)[:500]
+    
+    stage_ms = [
+        sum(timings.get(stage, 0) for stage in skipped_stages)
+        for timings in stage_samples
+    ]
+    average_pipeline_ms = sum(stage_ms) / len(stage_ms) if stage_ms else 0.0
+    
+    average_annotation_seconds = Annotation.objects.aggregate(
+        average=Avg('time_spent_seconds')
+    )['average'] or 0.0
+    
+    stats = {
+        'rejected_clips': rejected_count,
+        'rejected_audio_seconds': rejected_audio_seconds,
+        'by_reason': by_reason,
+        'compute_seconds_saved': round(rejected_count * average_pipeline_ms / 1000, 2),
+        'annotations_saved': rejected_count * settings.REQUIRED_ANNOTATIONS,
+        'annotator_seconds_saved': round(
+            rejected_count * settings.REQUIRED_ANNOTATIONS * average_annotation_seconds, 2
+        ),
+        'duplicate_clips': duplicate_clips.count(),
+    }
+    
+    return Response(stats)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def storage_tier_stats(request):
+    tiers = AudioClip.objects.values('storage_tier').annotate(
+        clips=Count('id'),
+        original_bytes=Sum('file_size_bytes'),
+        stored_bytes=Sum('stored_file_size_bytes'),
+        average_decode_ms=Avg('decode_latency_ms')
+    ).order_by('storage_tier')
+    
+    stats = {'tiers': {}, 'total_bytes_saved': 0}
+    for tier in tiers:
+        original_bytes = tier['original_bytes'] or 0
+        stored_bytes = tier['stored_bytes'] if tier['storage_tier'] != 'original' else original_bytes
+        stored_bytes = stored_bytes or 0
+        
+        stats['tiers'][tier['storage_tier']] = {
+            'clips': tier['clips'],
+            'original_bytes': original_bytes,
+            'stored_bytes': stored_bytes,
+            'bytes_saved': original_bytes - stored_bytes,
+            'compression_ratio': round(original_bytes / stored_bytes, 2) if stored_bytes else None,
+            'average_decode_ms': round(tier['average_decode_ms'], 2) if tier['average_decode_ms'] is not None else None,
+        }
+        stats['total_bytes_saved'] += original_bytes - stored_bytes
+    
+    return Response(stats)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def corpus_parquet_export(request):
+    from .tasks import export_corpus_parquet
+    
+    export_corpus_parquet.delay()
+    
+    return Response({'message': 'Corpus Parquet export started'}, status=status.HTTP_202_ACCEPTED)
@@ -160,12 +160,42 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared across workers and restarts: wallet nonces and dataset archive member sizes and CRCs live here
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_REDIS_URL', default=env('REDIS_URL', default='redis://localhost:6379/0')),
+    },
+}
+
 CELERY_BROKER_URL = env('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = env('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'expire-upload-sessions': {
+        'task': 'audio.tasks.expire_upload_sessions',
+        'schedule': timedelta(minutes=15),
+    },
+    'tier-archived-audio': {
+        'task': 'audio.tasks.tier_archived_audio',
+        'schedule': timedelta(hours=6),
+    },
+    'rebuild-annotation-queue': {
+        'task': 'annotations.tasks.rebuild_annotation_queue',
+        'schedule': timedelta(minutes=10),
+    },
+    'release-expired-annotation-leases': {
+        'task': 'annotations.tasks.release_expired_leases',
+        'schedule': timedelta(minutes=5),
+    },
+    'relay-consensus-events': {
+        'task': 'annotations.tasks.relay_consensus_events',
+        'schedule': timedelta(minutes=1),
+    },
+}
 
 AWS_ACCESS_KEY_ID = env('AWS_ACCESS_KEY_ID', default='')
 AWS_SECRET_ACCESS_KEY = env('AWS_SECRET_ACCESS_KEY', default='')
@@ -199,8 +229,59 @@ CONTRIBUTOR_REWARD_PERCENTAGE = env.int('CONTRIBUTOR_REWARD_PERCENTAGE', default
 VALIDATOR_REWARD_PERCENTAGE = env.int('VALIDATOR_REWARD_PERCENTAGE', default=30)
 CONSENSUS_THRESHOLD = env.int('CONSENSUS_THRESHOLD', default=85)
 REQUIRED_ANNOTATIONS = env.int('REQUIRED_ANNOTATIONS', default=3)
+ANNOTATION_EARLY_STOP_MIN_ANNOTATIONS = env.int('ANNOTATION_EARLY_STOP_MIN_ANNOTATIONS', default=2)
+ANNOTATION_EARLY_STOP_SIMILARITY = env.float('ANNOTATION_EARLY_STOP_SIMILARITY', default=95.0)
+ANNOTATION_EARLY_STOP_ASR_CONFIDENCE = env.float('ANNOTATION_EARLY_STOP_ASR_CONFIDENCE', default=0.9)
+ANNOTATION_MAX_ANNOTATIONS = env.int('ANNOTATION_MAX_ANNOTATIONS', default=7)
+CONSENSUS_BULK_CHUNK_SIZE = env.int('CONSENSUS_BULK_CHUNK_SIZE', default=500)
+CONSENSUS_CHECK_DEBOUNCE_SECONDS = env.int('CONSENSUS_CHECK_DEBOUNCE_SECONDS', default=5)
+CONSENSUS_CHECK_INFLIGHT_SECONDS = env.int('CONSENSUS_CHECK_INFLIGHT_SECONDS', default=120)
+CONSENSUS_OUTBOX_REDELIVER_SECONDS = env.int('CONSENSUS_OUTBOX_REDELIVER_SECONDS', default=10 * 60)
+CONSENSUS_OUTBOX_BATCH_SIZE = env.int('CONSENSUS_OUTBOX_BATCH_SIZE', default=500)
+ANNOTATION_QUEUE_ENABLED = env.bool('ANNOTATION_QUEUE_ENABLED', default=True)
+ANNOTATION_QUEUE_REDIS_URL = env('ANNOTATION_QUEUE_REDIS_URL', default=env('REDIS_URL', default='redis://localhost:6379/0'))
+ANNOTATION_QUEUE_SCAN_DEPTH = env.int('ANNOTATION_QUEUE_SCAN_DEPTH', default=200)
+ANNOTATION_QUEUE_REBUILD_BATCH_SIZE = env.int('ANNOTATION_QUEUE_REBUILD_BATCH_SIZE', default=5000)
+ANNOTATION_SEEN_TTL_SECONDS = env.int('ANNOTATION_SEEN_TTL_SECONDS', default=24 * 60 * 60)
+ANNOTATION_LEASE_SECONDS = env.int('ANNOTATION_LEASE_SECONDS', default=30 * 60)
+ANNOTATION_PREFETCH_MAX_TASKS = env.int('ANNOTATION_PREFETCH_MAX_TASKS', default=10)
 MAX_CLIP_DURATION_SECONDS = env.int('MAX_CLIP_DURATION_SECONDS', default=20)
 CHUNK_DURATION_SECONDS = env.int('CHUNK_DURATION_SECONDS', default=8)
+QUALITY_GATE_MIN_DURATION_SECONDS = env.float('QUALITY_GATE_MIN_DURATION_SECONDS', default=1.0)
+QUALITY_GATE_MIN_RMS = env.float('QUALITY_GATE_MIN_RMS', default=500.0)
+QUALITY_GATE_MIN_SNR_DB = env.float('QUALITY_GATE_MIN_SNR_DB', default=10.0)
+QUALITY_GATE_MAX_CLIPPING_RATIO = env.float('QUALITY_GATE_MAX_CLIPPING_RATIO', default=0.01)
+DEDUP_MAX_BIT_ERROR_RATE = env.float('DEDUP_MAX_BIT_ERROR_RATE', default=0.30)
+DEDUP_MAX_VERIFIED_CANDIDATES = env.int('DEDUP_MAX_VERIFIED_CANDIDATES', default=5)
+MAX_AUDIO_UPLOAD_BYTES = env.int('MAX_AUDIO_UPLOAD_BYTES', default=10 * 1024 * 1024)
+DIRECT_UPLOAD_EXPIRY_SECONDS = env.int('DIRECT_UPLOAD_EXPIRY_SECONDS', default=900)
+RESUMABLE_UPLOAD_EXPIRY_SECONDS = env.int('RESUMABLE_UPLOAD_EXPIRY_SECONDS', default=24 * 60 * 60)
+AUDIO_CACHE_DIR = env('AUDIO_CACHE_DIR', default='/tmp/linguana-audio-cache')
+AUDIO_CACHE_MAX_BYTES = env.int('AUDIO_CACHE_MAX_BYTES', default=2 * 1024 * 1024 * 1024)
+AUDIO_CACHE_LOW_WATER_RATIO = env.float('AUDIO_CACHE_LOW_WATER_RATIO', default=0.9)
+AUDIO_CACHE_EVICT_GRACE_SECONDS = env.int('AUDIO_CACHE_EVICT_GRACE_SECONDS', default=30)
+DATASET_EXPORT_CHUNK_SIZE = env.int('DATASET_EXPORT_CHUNK_SIZE', default=2000)
+DATASET_SHARD_CLIPS = env.int('DATASET_SHARD_CLIPS', default=1000)
+DATASET_SHARD_AUDIO_FORMAT = env('DATASET_SHARD_AUDIO_FORMAT', default='flac')
+PARQUET_EXPORT_BATCH_SIZE = env.int('PARQUET_EXPORT_BATCH_SIZE', default=10000)
+PRONUNCIATION_BATCH_SIZE = env.int('PRONUNCIATION_BATCH_SIZE', default=64)
+STORAGE_TIER_AFTER_DAYS = env.int('STORAGE_TIER_AFTER_DAYS', default=30)
+STORAGE_TIER_BATCH_SIZE = env.int('STORAGE_TIER_BATCH_SIZE', default=500)
+STORAGE_TIER_CODECS = {
+    'validated': env('STORAGE_TIER_VALIDATED_CODEC', default='flac'),
+    'rejected': env('STORAGE_TIER_REJECTED_CODEC', default='opus'),
+}
+STORAGE_TIER_OPUS_BITRATE = env('STORAGE_TIER_OPUS_BITRATE', default='32k')
+AUDIO_STREAM_MAX_AGE = env.int('AUDIO_STREAM_MAX_AGE', default=365 * 24 * 60 * 60)
+AUDIO_STREAM_TOKEN_MAX_AGE = env.int('AUDIO_STREAM_TOKEN_MAX_AGE', default=6 * 60 * 60)
+AUDIO_SENDFILE_HEADER = env('AUDIO_SENDFILE_HEADER', default='')
+AUDIO_ACCEL_REDIRECT_PREFIX = env('AUDIO_ACCEL_REDIRECT_PREFIX', default='/protected-audio/')
+AUDIO_CONTENT_TYPES = {
+    'wav': 'audio/wav',
+    'mp3': 'audio/mpeg',
+    'ogg': 'audio/ogg',
+    'webm': 'audio/webm',
+}
 
 LOGGING = {
     'version': 1,
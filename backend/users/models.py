@@ -55,25 +55,31 @@ class User(AbstractUser):
         
         today = timezone.now().date()
         
-        if self.last_contribution_date:
-            days_diff = (today - self.last_contribution_date).days
-            
-            if days_diff == 0:
-                return
-            elif days_diff == 1:
-                self.streak_days += 1
-            else:
-                self.streak_days = 1
-        else:
-            self.streak_days = 1
+        if self.last_contribution_date == today:
+            return
         
+        yesterday = today - timedelta(days=1)
+        
+        # Decided in the UPDATE itself so concurrent uploads on the same day count the streak once
+        User.objects.filter(pk=self.pk).exclude(last_contribution_date=today).update(
+            streak_days=models.Case(
+                models.When(last_contribution_date=yesterday, then=models.F('streak_days') + 1),
+                default=models.Value(1)
+            ),
+            last_contribution_date=today
+        )
+        
+        self.streak_days = self.streak_days + 1 if self.last_contribution_date == yesterday else 1
         self.last_contribution_date = today
-        self.save(update_fields=['streak_days', 'last_contribution_date'])
     
     def add_points(self, points):
+        User.objects.filter(pk=self.pk).update(
+            points=models.F('points') + points,
+            level=(models.F('points') + points) / 100 + 1
+        )
+        
         self.points += points
         self.level = (self.points // 100) + 1
-        self.save(update_fields=['points', 'level'])
     
     def get_initials(self):
         if self.nickname:
@@ -10,7 +10,7 @@ interface Task {
   id: string;
   clip: {
     id: string;
-    audio_url: string;
+    stream_url: string;
     dialect: string;
     duration: number;
   };
@@ -87,7 +87,7 @@ export function TaskCard({ task, onComplete, onSkip }: TaskCardProps) {
         </div>
 
         {/* Audio Player */}
-        <Waveform audioUrl={task.clip.audio_url} />
+        <Waveform audioUrl={task.clip.stream_url} />
       </div>
 
       {/* Annotation Editor */}